@@ -1,28 +1,24 @@
+import json
+
 import streamlit as st
-import importlib
+from dotenv import load_dotenv
+from utils import figures, perf, prewarm, registry
+
+load_dotenv()
 
 st.set_page_config(page_title="My Portfolio", layout="wide")
 
 def show_menu():
     """
     Displays the sidebar menu with the list of projects and returns the user's choice
-    along with a dictionary where the key is the project name and the value is the path
-    to the project's module.
+    along with a dictionary where the key is the project name and the value is the
+    project's registry entry.
+
+    Projects are discovered from the metadata declared in each `projects/*/app.py`,
+    so none of the project modules are imported to build the menu.
     """
     st.sidebar.title("Menu")
-    projects = {
-        "Home": "projects.main.app",
-        "Analysis Dashboard": "projects.dashboard.app",
-        "Dynamic Table Filter": "projects.dynamicTableFilter.app",
-        "Investment Simulator": "projects.investmentSimulator.app",
-        "Interactive Map": "projects.Interactive Map.app",
-        "Form Validation": "projects.Form Validation.app",
-        "Real Time Text Analysis": "projects.Real Time Text Analysis.app",
-        "Simple Recommendation": "projects.Simple Recommendation.app",
-        "ML Prediction App": "projects.Ml Prediction App.app",
-        "Multi Page Dashboard": "projects.Multi Page Dashboard.app",
-        "Weather App": "projects.Weather Api App.app"
-    }
+    projects = registry.discover_projects()
     return st.sidebar.selectbox("Choose a project", list(projects.keys())), projects
 
 def load_project(project_name, projects):
@@ -32,18 +28,74 @@ def load_project(project_name, projects):
     Args:
         project_name (str): The name of the project selected by the user.
         projects (dict): A dictionary where keys are project names and values
-                         are the corresponding module paths.
+                         are the corresponding registry entries.
 
     The function imports the module corresponding to the selected project
-    and calls its `show` function to display the project.
+    and calls its `show` function to display the project, timing the rerun and its
+    stages with `perf.page`. With `?profile=1` in the URL, this one rerun runs under
+    cProfile and the report is shown below the page and on the Performance page.
     If the project is not found in the dictionary, an error message is displayed.
     """
     if project_name in projects:
-        project_module = importlib.import_module(projects[project_name])
-        project_module.show()
+        profiling = st.query_params.get("profile") == "1"
+        if profiling:
+            del st.query_params["profile"]
+        with perf.page(project_name):
+            with perf.stage("import"):
+                project_module = registry.import_project(projects[project_name]["module"])
+            if profiling:
+                _, report = perf.profile(project_module.show)
+                st.session_state["last_profile"] = {"page": project_name, "report": report}
+                with st.expander("Profile of this rerun"):
+                    st.code(report, language=None)
+            else:
+                project_module.show()
     else:
         st.error("Project not found.")
 
+def show_import_report():
+    """
+    Displays the import time recorded for each project in this server process.
+
+    This page is not listed in the menu; open it with `?report=imports`.
+    For cold-start numbers measured in a fresh interpreter, run `python -m utils.registry`.
+    The page also shows this session's chart render counts and times, and the image cache size.
+    """
+    st.title("⏱ Import Report")
+    st.dataframe(registry.import_report(), width="stretch")
+
+    if prewarm.is_enabled():
+        st.subheader("Pre-warm Status")
+        st.json(prewarm.status())
+
+    st.subheader("Charts")
+    st.json({"session": st.session_state.get("figure_metrics", {}), "process": figures.cache_metrics()})
+
+def show_performance_report():
+    """
+    Displays the rolling rerun latency of each page and stage in this server process.
+
+    This page is not listed in the menu; open it with `?report=performance`. The same numbers
+    can be downloaded as JSON, and with `PERF_LOG` set every rerun is also appended to a JSON
+    lines file that `python -m utils.perf` summarizes.
+    """
+    st.title("⏱ Performance")
+    st.caption(f"Percentiles of the last {perf.WINDOW} reruns of each page. Add `?profile=1` to a page URL to profile one rerun.")
+    rows = perf.summary()
+    if rows:
+        st.dataframe(rows, width="stretch", hide_index=True)
+        st.download_button("Download JSON", json.dumps(rows, indent=2), file_name="performance.json", mime="application/json")
+    else:
+        st.info("No page has been rendered yet.")
+    if st.button("Reset timings"):
+        perf.reset()
+        st.rerun()
+
+    last_profile = st.session_state.get("last_profile")
+    if last_profile:
+        st.subheader(f"Last profile: {last_profile['page']}")
+        st.code(last_profile["report"], language=None)
+
 def main():
     """
     Main function to display the project portfolio application.
@@ -53,11 +105,25 @@ def main():
     the corresponding project module is dynamically imported and displayed
     using Streamlit. If no project is selected, the application remains on the
     main menu.
+
+    When pre-warming is enabled, the remaining projects are imported and their
+    datasets loaded in the background once the Home page has been rendered.
     """
+    report = st.query_params.get("report")
+    if report == "imports":
+        show_import_report()
+        return
+    if report == "performance":
+        show_performance_report()
+        return
+
     choice, projects = show_menu()
     
     if choice:
         load_project(choice, projects)
 
+    if choice == "Home" and prewarm.is_enabled():
+        prewarm.start(projects, skip={choice})
+
 if __name__ == "__main__":
     main()
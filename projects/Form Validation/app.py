@@ -1,5 +1,8 @@
 import streamlit as st
 
+PROJECT_TITLE = "Form Validation"
+PROJECT_ORDER = 5
+
 def reset_form():
     """
     Resets the form inputs to their default values.
@@ -1,50 +1,263 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pydeck as pdk
 import os
+import time
+from utils import datasets, perf, spatial
 
+PROJECT_TITLE = "Interactive Map"
+PROJECT_ORDER = 4
+
+DATA_PATH = os.path.join('data', 'geographic_data.csv')
+REQUIRED_COLUMNS = ['latitude', 'longitude', 'category']
+LABEL_COLUMN = 'name'
+MAX_MARKERS = 5000
+MAP_WIDTH = 800
+MAP_HEIGHT = 500
+MAX_NEAREST = 1000
+PALETTE = [[255, 75, 75], [31, 119, 180], [44, 160, 44], [255, 127, 14], [148, 103, 189], [140, 86, 75], [227, 119, 194]]
+
+@perf.timed("load")
 def load_data():
     """Loads geographic data from a CSV file located in the 'data' directory.
 
+    Only the required columns, and the optional 'name' label, are loaded through the
+    shared dataset cache and columnar store.
+
     Returns:
-        pd.DataFrame: The DataFrame containing the geographical data with required
-        columns 'latitude', 'longitude', and 'category'. If the file or required
-        columns are missing, an error message is displayed and an empty DataFrame
-        is returned.
-    """
-    file_path = os.path.join('data', 'geographic_data.csv')
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        if {'latitude', 'longitude', 'category'}.issubset(df.columns):
-            return df
+        datasets.Dataset: The dataset with the required columns 'latitude', 'longitude'
+        and 'category', or None if the file or required columns are missing, in which
+        case an error message is displayed.
+    """
+    if os.path.exists(DATA_PATH):
+        dataset = datasets.load_dataset(DATA_PATH, categorical=['category'], columns=REQUIRED_COLUMNS + [LABEL_COLUMN])
+        if set(REQUIRED_COLUMNS).issubset(dataset.frame.columns):
+            return dataset
         else:
             st.error("O arquivo CSV deve conter as colunas: latitude, longitude e category.")
-            return pd.DataFrame()
+            return None
     else:
         st.error("Arquivo CSV não encontrado na pasta 'data'.")
-        return pd.DataFrame()
+        return None
+
+@perf.timed("compute")
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_spatial_index(file_path, signature, _dataset):
+    """
+    Builds a spatial index per category once per file version and shares it across sessions.
+
+    Args:
+        file_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset, so a new version gets new indexes.
+        _dataset (datasets.Dataset): The dataset to index (not hashed).
+
+    Returns:
+        dict: A `spatial.GridIndex` of the points of each category, keyed by category.
+    """
+    df = _dataset.frame.dropna(subset=['latitude', 'longitude'])
+    return {
+        category: spatial.GridIndex(group['latitude'].to_numpy(), group['longitude'].to_numpy(), rows=group.index.to_numpy())
+        for category, group in df.groupby('category', observed=True)
+    }
+
+def warm():
+    """Loads the dataset and builds the spatial indexes so the first visit skips both."""
+    if os.path.exists(DATA_PATH):
+        dataset = datasets.load_dataset(DATA_PATH, categorical=['category'], columns=REQUIRED_COLUMNS + [LABEL_COLUMN])
+        if set(REQUIRED_COLUMNS).issubset(dataset.frame.columns):
+            get_spatial_index(DATA_PATH, dataset.signature, dataset)
+
+def viewport_controls(indexes):
+    """
+    Shows the zoom and center controls of the map in the sidebar.
+
+    They default to a view that fits every point of the selected categories. The map component
+    does not report its viewport back to the server, so these controls define the view that is
+    served, and its center is the location of radius and nearest-neighbour queries.
+
+    Args:
+        indexes (dict): The `spatial.GridIndex` of each selected category.
+
+    Returns:
+        tuple: The center latitude, center longitude and zoom level.
+    """
+    south = min(float(index.lat.min()) for index in indexes.values())
+    north = max(float(index.lat.max()) for index in indexes.values())
+    west = min(float(index.lon.min()) for index in indexes.values())
+    east = max(float(index.lon.max()) for index in indexes.values())
+    st.sidebar.subheader("View")
+    zoom = st.sidebar.slider("Zoom:", 0, spatial.MAX_LEVEL,
+                             spatial.fit_zoom(south, west, north, east, MAP_WIDTH, MAP_HEIGHT))
+    lat = st.sidebar.slider("Center latitude:", -spatial.MAX_LATITUDE, spatial.MAX_LATITUDE,
+                            float(np.clip((south + north) / 2, -spatial.MAX_LATITUDE, spatial.MAX_LATITUDE)), step=0.01)
+    lon = st.sidebar.slider("Center longitude:", -180.0, 180.0, (west + east) / 2, step=0.01)
+    return lat, lon, zoom
+
+def point_frame(category, index, df, positions, distances=None):
+    """
+    Returns the markers of some points of an index.
+
+    Args:
+        category (str): The category of the index.
+        index (spatial.GridIndex): The index the positions refer to.
+        df (pd.DataFrame): The dataset the index rows refer to.
+        positions (np.ndarray): Positions of the points in the index.
+        distances (np.ndarray, optional): Their distances in km to a query location.
+
+    Returns:
+        pd.DataFrame: The 'category', 'latitude', 'longitude', 'count' and 'label' of each point,
+        and its 'distance_km' when distances are given.
+    """
+    rows = index.rows[positions]
+    labels = df.loc[rows, LABEL_COLUMN].astype(str).to_numpy() if LABEL_COLUMN in df.columns else rows.astype(str)
+    frame = pd.DataFrame({
+        'category': category, 'latitude': index.lat[positions], 'longitude': index.lon[positions],
+        'count': 1, 'label': labels,
+    })
+    if distances is not None:
+        frame['distance_km'] = np.round(distances, 3)
+    return frame
+
+@perf.timed("compute")
+def markers(indexes, df, bounds, zoom):
+    """
+    Returns the markers of a viewport: the points themselves when there are at most
+    `MAX_MARKERS`, otherwise one cluster per grid cell of the zoom level and category.
+
+    Args:
+        indexes (dict): The `spatial.GridIndex` of each selected category.
+        df (pd.DataFrame): The dataset the index rows refer to.
+        bounds (tuple): The (south, west, north, east) of the viewport.
+        zoom (int): The zoom level of the map.
+
+    Returns:
+        tuple: A DataFrame with 'category', 'latitude', 'longitude', 'count' and 'label'
+               columns, and the exact number of points in view. Cluster counts include the
+               points of their whole cell, which may extend past the viewport.
+    """
+    in_view = sum(index.count(bounds) for index in indexes.values())
+    if in_view <= MAX_MARKERS:
+        found = {category: index.points(bounds) for category, index in indexes.items()}
+        frames = [point_frame(category, indexes[category], df, positions) for category, positions in found.items()]
+        return pd.concat(frames, ignore_index=True), in_view
+
+    frames = []
+    for category, index in indexes.items():
+        _, counts, lat, lon = index.clusters(bounds, zoom)
+        frames.append(pd.DataFrame({
+            'category': category, 'latitude': lat, 'longitude': lon, 'count': counts,
+            'label': [f"{count:,} {category} points" for count in counts],
+        }))
+    return pd.concat(frames, ignore_index=True), in_view
+
+@perf.timed("compute")
+def search(indexes, df, lat, lon, radius_km=None, k=None):
+    """
+    Answers a radius or nearest-neighbour query over several categories.
+
+    Each category index is queried on its own and the results are merged by distance.
+
+    Args:
+        indexes (dict): The `spatial.GridIndex` of each selected category.
+        df (pd.DataFrame): The dataset the index rows refer to.
+        lat (float): The latitude of the query location.
+        lon (float): The longitude of the query location.
+        radius_km (float, optional): Return the points within this distance.
+        k (int, optional): Return the k nearest points instead.
+
+    Returns:
+        tuple: The matching points nearest first, as `point_frame` rows with their
+               'distance_km', and the query time in milliseconds.
+    """
+    start = time.perf_counter()
+    frames = []
+    for category, index in indexes.items():
+        positions, distances = index.within(lat, lon, radius_km) if k is None else index.nearest(lat, lon, k)
+        frames.append(point_frame(category, index, df, positions, distances))
+    points = pd.concat(frames, ignore_index=True).sort_values('distance_km', kind='stable', ignore_index=True)
+    if k is not None:
+        points = points.head(k)
+    return points, (time.perf_counter() - start) * 1000
+
+def show_index_stats(indexes, query_ms):
+    """Shows the size, build time and memory of each category index, and the last query time."""
+    with st.expander("Index statistics"):
+        st.dataframe(pd.DataFrame([
+            {"category": category, "points": len(index), "build_ms": round(index.build_seconds * 1000, 1),
+             "memory_mb": round(index.nbytes / 2 ** 20, 2)}
+            for category, index in indexes.items()
+        ]), hide_index=True)
+        st.caption(f"Last query: {query_ms:.2f} ms")
 
 def show():
     """
     Displays an interactive map with geographic data filtered by category.
 
-    The function loads geographic data from a CSV file, and if the data is available, it displays a sidebar 
-    with a category filter. The user can select a category to filter the data points shown on the map. 
-    The filtered data is then displayed as points on an interactive map, along with a subheader showing 
-    the number of points for the selected category.
+    The function loads geographic data from a CSV file, and if the data is available, it displays a sidebar
+    with a category filter, the zoom and center of the view and the kind of query. In the viewport mode, only
+    the points of the selected categories that fall inside the view are sent to the map, read from cached
+    spatial indexes; when there are more than `MAX_MARKERS` of them, they are clustered server-side so the
+    browser never receives more markers than that. The radius and nearest modes list the points within a
+    distance of, or nearest to, the center of the view.
 
     If the data file is not found or if the DataFrame is empty, the function exits early.
     """
     st.title("🌍 Interactive Map with Geographic Data")
-    
-    df = load_data()
-    if df.empty:
+
+    dataset = load_data()
+    if dataset is None or dataset.frame.empty:
+        return
+    all_indexes = get_spatial_index(DATA_PATH, dataset.signature, dataset)
+    if not all_indexes:
         return
-    
+
     st.sidebar.header("Filters")
-    categories = df['category'].unique()
-    selected_category = st.sidebar.selectbox("Select Category:", options=categories)
-    
-    filtered_df = df[df['category'] == selected_category]
-    
-    st.subheader(f"Displaying {len(filtered_df)} points for category: {selected_category}")
-    st.map(filtered_df[['latitude', 'longitude']])
+    categories = list(all_indexes)
+    selected = st.sidebar.multiselect("Select Categories:", options=categories, default=categories[:1])
+    if not selected:
+        st.info("Select at least one category.")
+        return
+    indexes = {category: all_indexes[category] for category in selected}
+    colors = {category: PALETTE[position % len(PALETTE)] for position, category in enumerate(categories)}
+
+    lat, lon, zoom = viewport_controls(indexes)
+    mode = st.sidebar.radio("Query:", ["Points in view", "Within a radius", "Nearest points"])
+
+    if mode == "Points in view":
+        start = time.perf_counter()
+        points, found = markers(indexes, dataset.frame, spatial.viewport(lat, lon, zoom, MAP_WIDTH, MAP_HEIGHT), zoom)
+        query_ms = (time.perf_counter() - start) * 1000
+        st.subheader(f"Displaying {found} of {sum(map(len, indexes.values()))} points for: {', '.join(selected)}")
+    else:
+        if mode == "Within a radius":
+            radius_km = st.sidebar.number_input("Radius (km):", min_value=0.1, max_value=20_000.0, value=100.0)
+            points, query_ms = search(indexes, dataset.frame, lat, lon, radius_km=radius_km)
+            st.subheader(f"{len(points)} points within {radius_km:g} km of ({lat:.2f}, {lon:.2f})")
+        else:
+            k = st.sidebar.number_input("Number of points:", min_value=1, max_value=MAX_NEAREST, value=10)
+            points, query_ms = search(indexes, dataset.frame, lat, lon, k=int(k))
+            st.subheader(f"The {len(points)} points nearest to ({lat:.2f}, {lon:.2f})")
+        found = len(points)
+        st.dataframe(points.drop(columns='count').head(MAX_MARKERS), hide_index=True)
+        points = points.head(MAX_MARKERS)
+
+    points['radius'] = 4 + 3 * np.log2(points['count'])
+    points['color'] = points['category'].map(colors)
+    layers = [pdk.Layer(
+        "ScatterplotLayer", data=points, get_position=['longitude', 'latitude'], get_radius='radius',
+        radius_units='pixels', get_fill_color='color', opacity=0.7, pickable=True,
+    )]
+    if mode != "Points in view":
+        layers.append(pdk.Layer(
+            "ScatterplotLayer", data=pd.DataFrame({'latitude': [lat], 'longitude': [lon], 'label': ["Query location"]}),
+            get_position=['longitude', 'latitude'], get_radius=8, radius_units='pixels',
+            get_fill_color=[0, 0, 0], pickable=True,
+        ))
+    st.pydeck_chart(pdk.Deck(
+        layers=layers, map_style=None, tooltip={"text": "{label}"},
+        initial_view_state=pdk.ViewState(latitude=lat, longitude=lon, zoom=zoom),
+    ), height=MAP_HEIGHT)
+    st.caption(f"{len(points)} markers sent for {found} points"
+               + (" (clustered)" if (points['count'] > 1).any() else ""))
+    show_index_stats(indexes, query_ms)
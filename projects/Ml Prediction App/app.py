@@ -1,19 +1,26 @@
 import os
-import pickle
+import tempfile
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 import numpy as np
+from utils import datasets, figures, ingest, models, perf, scoring
+
+PROJECT_TITLE = "ML Prediction App"
+PROJECT_ORDER = 8
+PROJECT_HEAVY_IMPORTS = ["sklearn.linear_model", "plotly.graph_objects"]
 
 DATA_DIR = "data"
-MODEL_PATH = os.path.join(DATA_DIR, "salary_model.pkl")
 CSV_PATH = os.path.join(DATA_DIR, "salary_data.csv")
+FEATURES = ["Experience_Years", "Current_Salary"]
+TARGET = "Future_Salary"
+COLUMNS = FEATURES + [TARGET]
+MODEL_NAME = "salary"
 
+@perf.timed("load")
 def load_data():
     """
     Loads the dataset from the CSV file in the 'data' folder.
 
+    The dataset is loaded through the shared dataset cache and columnar store.
     If the file does not exist, an error message is displayed and None is returned.
 
     Returns:
@@ -22,72 +29,230 @@ def load_data():
     if not os.path.exists(CSV_PATH):
         st.error("⚠️ Dataset not found! Please add the 'salary_data.csv' file to the 'data' folder.")
         return None
-    return pd.read_csv(CSV_PATH)
+    return datasets.load_dataset(CSV_PATH, columns=COLUMNS).frame
 
-def train_model(df):
+def train_model(X, y):
     """
     Trains a linear regression model to predict future salaries based on experience and current salary.
 
-    If a pre-trained model exists at the specified path, it is loaded and returned.
-    Otherwise, a new model is trained with the provided data and saved to the file system.
-
     Args:
-        df (pd.DataFrame): DataFrame containing the dataset with 'Experience_Years', 'Current_Salary', and 'Future_Salary' columns.
+        X (pd.DataFrame): The 'Experience_Years' and 'Current_Salary' columns.
+        y (pd.Series): The 'Future_Salary' column.
 
     Returns:
         LinearRegression: The trained linear regression model.
     """
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            return pickle.load(f)
-
-    os.makedirs(DATA_DIR, exist_ok=True)
-
-    X = df[["Experience_Years", "Current_Salary"]]
-    y = df["Future_Salary"]
+    from sklearn.linear_model import LinearRegression
 
     model = LinearRegression()
     model.fit(X, y)
-
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model, f)
-
     return model
 
-def show():
+@perf.timed("load")
+def get_model():
     """
-    Displays a Streamlit app with a title, a sidebar for user input, and a prediction of a future salary based on the input data.
-
-    The app first loads the dataset from a CSV file and trains a linear regression model to predict future salaries based on experience and current salary.
-
-    The user can input their years of experience and current salary in the sidebar, and the app will display the predicted future salary and a comparison with the actual data from the dataset.
+    Returns the salary model for the current version of the dataset from the model registry.
 
-    If the dataset file is not found, an error message is displayed and the app exits early.
+    The model is versioned on the dataset content and feature set, so a changed CSV is
+    retrained in the background while the previous model keeps serving.
 
+    Returns:
+        tuple: The model and its registry entry.
     """
-    st.title("💼 Future Salary Prediction with Machine Learning")
+    return models.MODELS.get(MODEL_NAME, CSV_PATH, FEATURES, TARGET, train_model)
 
-    df = load_data()
-    if df is None:
-        return
+def warm():
+    """Loads the dataset and the model into the caches so the first visit skips the CSV parse and training."""
+    if os.path.exists(CSV_PATH):
+        datasets.load_dataset(CSV_PATH, columns=COLUMNS)
+        get_model()
 
-    model = train_model(df)
+def show_single(df, model):
+    """
+    Displays the sidebar inputs, the predicted future salary and a comparison with the dataset.
 
+    Args:
+        df (pd.DataFrame): The training dataset.
+        model: The serving salary model.
+    """
     st.sidebar.header("🔢 Enter Your Data")
     experience_years = st.sidebar.number_input("Years of Experience", min_value=0, max_value=50, value=5, step=1)
     current_salary = st.sidebar.number_input("Current Salary ($)", min_value=1000, max_value=50000, value=5000, step=500)
 
     input_data = np.array([[experience_years, current_salary]])
-    prediction = model.predict(input_data)[0]
+    prediction = models.MODELS.predict(MODEL_NAME, model, input_data)[0]
 
     st.subheader("📈 Estimated Future Salary")
     st.write(f"💰 $ {prediction:,.2f}")
 
     st.subheader("📊 Comparison with Dataset")
-    fig, ax = plt.subplots()
-    ax.scatter(df["Experience_Years"], df["Future_Salary"], color="blue", label="Actual Data")
-    ax.scatter(experience_years, prediction, color="red", label="Prediction", marker="x", s=100)
-    ax.set_xlabel("Years of Experience")
-    ax.set_ylabel("Future Salary ($)")
-    ax.legend()
-    st.pyplot(fig)
+    plot_comparison(df, experience_years, prediction)
+
+@perf.timed("chart")
+def plot_comparison(df, experience_years, prediction):
+    """
+    Plots the dataset's future salaries against experience, with the prediction highlighted.
+
+    The chart is a native Plotly chart, or a cached matplotlib image when `CHART_BACKEND=matplotlib`.
+
+    Args:
+        df (pd.DataFrame): The training dataset.
+        experience_years (int): The experience entered by the user.
+        prediction (float): The predicted future salary.
+    """
+    metrics = st.session_state.setdefault("figure_metrics", {})
+    if figures.native_charts():
+        import plotly.graph_objects as go
+
+        fig = go.Figure([
+            go.Scatter(x=df["Experience_Years"], y=df["Future_Salary"], mode="markers",
+                       marker_color="blue", name="Actual Data"),
+            go.Scatter(x=[experience_years], y=[prediction], mode="markers",
+                       marker=dict(color="red", symbol="x", size=14), name="Prediction"),
+        ])
+        fig.update_layout(xaxis_title="Years of Experience", yaxis_title="Future Salary ($)")
+        st.plotly_chart(fig)
+        figures.record(metrics, "native")
+        return
+
+    def draw(fig, ax):
+        ax.scatter(df["Experience_Years"], df["Future_Salary"], color="blue", label="Actual Data")
+        ax.scatter(experience_years, prediction, color="red", label="Prediction", marker="x", s=100)
+        ax.set_xlabel("Years of Experience")
+        ax.set_ylabel("Future Salary ($)")
+        ax.legend()
+
+    key = figures.data_key(df["Experience_Years"], df["Future_Salary"], experience_years, prediction)
+    st.image(figures.render_matplotlib(draw, key, 640, 480, metrics=metrics))
+
+@perf.timed("compute")
+def run_batch(uploaded_file, fmt, model, version):
+    """
+    Scores an uploaded file into a temporary file, once per file content and model version.
+
+    The result is kept in the session state, so the rerun triggered by the download button
+    does not score the file again. The previous result file of the session is deleted.
+
+    Args:
+        uploaded_file: The uploaded CSV or Parquet file.
+        fmt (str): 'csv' or 'parquet'.
+        model: The serving salary model.
+        version (str): The version of the model.
+
+    Returns:
+        dict: The scoring report, with the `path` of the scored file, or None if the file
+              could not be scored, in which case an error message is displayed.
+    """
+    key = (ingest.upload_hash(uploaded_file), version)
+    result = st.session_state.get("batch_result")
+    if result is not None and result["key"] == key and os.path.exists(result["path"]):
+        return result
+    if result is not None and os.path.exists(result["path"]):
+        os.remove(result["path"])
+
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    progress = st.progress(0.0, text="Scoring...")
+    total = getattr(uploaded_file, "size", 0) or 0
+
+    def on_batch(rows):
+        fraction = min(uploaded_file.tell() / total, 1.0) if total else 0.0
+        progress.progress(fraction, text=f"Scored {rows:,} rows...")
+
+    try:
+        report = scoring.score_file(uploaded_file, fmt, FEATURES, scoring.linear_scorer(model), path, on_batch=on_batch)
+    except Exception as e:
+        st.session_state.pop("batch_result", None)
+        if os.path.exists(path):
+            os.remove(path)
+        st.error(f"⚠️ Could not score the file: {e}")
+        return None
+    finally:
+        progress.empty()
+    result = st.session_state["batch_result"] = {"key": key, "path": path, **report}
+    return result
+
+def show_batch(model, entry):
+    """
+    Displays the batch mode: scores an uploaded CSV or Parquet export and offers the result for download.
+
+    The file's columns are checked against the model features before any row is read.
+
+    Args:
+        model: The serving salary model.
+        entry (dict): The registry entry of the model.
+    """
+    st.subheader("📦 Batch Prediction")
+    uploaded_file = st.file_uploader(
+        f"Upload a CSV or Parquet file with the columns {', '.join(FEATURES)}", type=["csv", "parquet"]
+    )
+    if uploaded_file is None:
+        return
+
+    fmt = scoring.file_format(uploaded_file.name)
+    try:
+        missing = scoring.missing_columns(scoring.read_columns(uploaded_file, fmt), FEATURES)
+    except Exception as e:
+        st.error(f"⚠️ Could not read the file: {e}")
+        return
+    if missing:
+        st.error(f"⚠️ Missing required columns: {', '.join(missing)}")
+        return
+
+    result = run_batch(uploaded_file, fmt, model, entry["version"])
+    if result is None:
+        return
+    if result["rows"] == 0:
+        st.warning("⚠️ The file has no rows.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows scored", f"{result['rows']:,}")
+    col2.metric("Rows/second", f"{result['rows_per_second']:,.0f}")
+    col3.metric("Invalid rows", f"{result['invalid_rows']:,}")
+    if result["invalid_rows"]:
+        st.caption("Rows with missing or non-numeric features have an empty prediction.")
+
+    name = os.path.splitext(uploaded_file.name)[0]
+    with open(result["path"], "rb") as f:
+        st.download_button(
+            "📥 Download predictions",
+            data=f,
+            file_name=f"{name}_predictions.{fmt}",
+            mime="application/octet-stream" if fmt == "parquet" else "text/csv",
+        )
+
+def show():
+    """
+    Displays a Streamlit app that predicts future salaries from experience and current salary.
+
+    The app first loads the dataset from a CSV file and gets the linear regression model trained on it
+    from the model registry.
+
+    In single mode, the user inputs their years of experience and current salary in the sidebar, and the
+    app displays the predicted future salary and a comparison with the actual data from the dataset.
+    In batch mode, the user uploads a CSV or Parquet export, which is scored in chunks and can be
+    downloaded with a prediction column.
+
+    If the dataset file is not found, an error message is displayed and the app exits early.
+    """
+    st.title("💼 Future Salary Prediction with Machine Learning")
+
+    df = load_data()
+    if df is None:
+        return
+
+    model, entry = get_model()
+    if entry["training"]:
+        st.info("🔄 The dataset changed. A new model is training; predictions use the previous model until it is ready.")
+    elif entry["error"]:
+        st.warning(f"⚠️ Training on the new dataset failed ({entry['error']}); predictions use the previous model.")
+
+    mode = st.sidebar.radio("Mode", ["Single prediction", "Batch prediction"])
+    if mode == "Single prediction":
+        show_single(df, model)
+    else:
+        show_batch(model, entry)
+
+    with st.expander("Model metrics"):
+        st.json(models.MODELS.metrics(MODEL_NAME))
@@ -1,11 +1,20 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+from utils import ingest, perf, stats
+
+PROJECT_TITLE = "Multi Page Dashboard"
+PROJECT_ORDER = 9
+
+SCATTER_MAX_POINTS = 50_000
 
-@st.cache_data
 def load_data(uploaded_file):
     """
-    Loads data from an uploaded CSV file and stores it in the session state.
+    Loads data from an uploaded CSV file and stores a handle to it in the session state.
+
+    The frame itself lives in the shared frame registry, so sessions that upload the same
+    file share one copy; the session only keeps a handle with the file's content hash.
 
     Args:
         uploaded_file: A file-like object representing the uploaded CSV file.
@@ -13,33 +22,119 @@ def load_data(uploaded_file):
     Returns:
         pd.DataFrame: The DataFrame containing the data from the uploaded CSV file.
     """
-    df = pd.read_csv(uploaded_file)
-    st.session_state["data"] = df
+    key, df = ingest.load_csv(uploaded_file)
+    handle = st.session_state.get("data_handle")
+    if handle is None or handle.key != key:
+        st.session_state["data_handle"] = ingest.FRAMES.handle(key)
     return df
 
-@st.cache_data
-def compute_statistics(df):
+@perf.timed("load")
+def get_data():
     """
-    Computes summary statistics of a DataFrame.
+    Returns the data referenced by the session's handle.
+
+    Returns:
+        tuple: The content hash and the shared DataFrame, or (None, None) if no file was uploaded.
+    """
+    handle = st.session_state.get("data_handle")
+    if handle is None:
+        return None, None
+    return handle.key, ingest.get_frame(handle.key)
+
+@perf.timed("compute")
+@st.cache_data(max_entries=64)
+def compute_statistics(content_key):
+    """
+    Computes summary statistics of an uploaded dataset.
+
+    Each numeric column is summarized in one chunked pass, with the quartiles estimated
+    from a quantile sketch instead of sorting the column. The cache is keyed on the content
+    hash, so the DataFrame is never hashed or pickled.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing the data.
+        content_key (str): The content hash of the upload.
 
     Returns:
         pd.DataFrame: The DataFrame containing the summary statistics.
     """
-    return df.describe()
+    return stats.describe_frame(ingest.get_frame(content_key))
+
+@perf.timed("compute")
+@st.cache_data(max_entries=256)
+def compute_histogram(content_key, column):
+    """
+    Computes the histogram bins of a numeric column server-side.
+
+    Args:
+        content_key (str): The content hash of the upload.
+        column (str): The numeric column to bin.
+
+    Returns:
+        pd.DataFrame: The non-empty bins with their start, end, center and count.
+    """
+    df = ingest.get_frame(content_key)
+    return stats.profile(df[column].to_numpy(dtype=float)).histogram.to_frame()
+
+@perf.timed("compute")
+@st.cache_data(max_entries=64)
+def compute_density(content_key, x_axis, y_axis, bins):
+    """
+    Aggregates two numeric columns into a 2-D density grid over their full range.
+
+    Args:
+        content_key (str): The content hash of the upload.
+        x_axis (str): The column plotted along x.
+        y_axis (str): The column plotted along y.
+        bins (int): Cells per axis.
+
+    Returns:
+        tuple: The cell counts (rows along y), and the cell centers along x and y.
+    """
+    df = ingest.get_frame(content_key)
+    x = df[x_axis].to_numpy(dtype=float)
+    y = df[y_axis].to_numpy(dtype=float)
+    return stats.density_grid(x, y, (np.nanmin(x), np.nanmax(x)), (np.nanmin(y), np.nanmax(y)), bins)
+
+@perf.timed("compute")
+@st.cache_data(max_entries=64)
+def compute_sample(content_key, x_axis, y_axis, x_range, y_range, max_points):
+    """
+    Selects a stratified sample of the points inside a zoom window.
+
+    Args:
+        content_key (str): The content hash of the upload.
+        x_axis (str): The column plotted along x.
+        y_axis (str): The column plotted along y.
+        x_range (tuple): The (min, max) of the window along x.
+        y_range (tuple): The (min, max) of the window along y.
+        max_points (int): The maximum number of points to return.
+
+    Returns:
+        pd.DataFrame: The sampled rows, restricted to the two columns.
+    """
+    df = ingest.get_frame(content_key)
+    x = df[x_axis].to_numpy(dtype=float)
+    y = df[y_axis].to_numpy(dtype=float)
+    rows = stats.stratified_sample(x, y, x_range, y_range, max_points)
+    return df.iloc[rows][list(dict.fromkeys([x_axis, y_axis]))]
+
+def zoom_slider(label, full_range):
+    """Displays a range slider over a column's full range, or returns the range if it is a single value."""
+    if not full_range[0] < full_range[1]:
+        return full_range
+    return st.slider(label, full_range[0], full_range[1], full_range)
 
 def page1():
         """
         Displays the first page of the app with a file uploader, data preview, and information messages.
 
-        The user can upload a CSV file, and if the file is valid, the data is stored in session_state and
-        the app displays a success message. If the user has previously uploaded a file, the app displays
-        an information message and uses the previously uploaded data. If no file is uploaded, the app
-        displays a warning message and does not display the data preview.
+        The user can upload a CSV file, and if the file is valid, a handle to the shared data is stored in
+        session_state and the app displays a success message. If the user has previously uploaded a file,
+        the app displays an information message and uses the previously uploaded data. If no file is
+        uploaded, the app displays a warning message and does not display the data preview.
 
-        The page also displays the first few rows of the uploaded data as a data preview.
+        The page also displays the first few rows of the uploaded data as a data preview, and the
+        metrics of the shared data registry.
         """
         st.title("📂 Upload and View Data")
         uploaded_file = st.file_uploader("Upload your CSV file", type=["csv"])
@@ -47,8 +142,8 @@ def page1():
         if uploaded_file is not None:
             df = load_data(uploaded_file)
             st.success("✅ Data successfully uploaded!")
-        elif "data" in st.session_state:
-            df = st.session_state["data"]
+        elif "data_handle" in st.session_state:
+            _, df = get_data()
             st.info("ℹ️ Using previously uploaded data.")
         else:
             st.warning("⚠️ No file uploaded yet.")
@@ -57,6 +152,9 @@ def page1():
         if df is not None:
             st.write("### Data Preview")
             st.dataframe(df.head())
+
+        with st.expander("Shared data registry"):
+            st.json(ingest.FRAMES.metrics())
         
 def page2():
     """
@@ -66,16 +164,18 @@ def page2():
     If the dataset contains less than one numeric column, a warning message is displayed. If no dataset is available, a separate warning message is displayed.
     """
     st.title("📊 Statistical Analysis")
-    if "data" in st.session_state:
-        df = st.session_state["data"]
-        stats = compute_statistics(df)
+    key, df = get_data()
+    if df is not None:
+        summary = compute_statistics(key)
         st.write("### Data Summary")
-        st.dataframe(stats)
+        st.dataframe(summary)
 
         numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
         if numeric_cols:
             column = st.selectbox("Select a column for distribution plot:", numeric_cols)
-            fig = px.histogram(df, x=column, nbins=30, title=f"Distribution of {column}")
+            histogram = compute_histogram(key, column)
+            fig = px.bar(histogram, x="bin_center", y="count", title=f"Distribution of {column}")
+            fig.update_layout(bargap=0, xaxis_title=column)
             st.plotly_chart(fig)
     else:
         st.warning("⚠️ No data available. Please upload a CSV on the first page.")
@@ -88,18 +188,49 @@ def page3():
     in a scatter plot. If the dataset contains less than two numeric columns, a warning
     message is displayed. If no dataset is available, a separate warning message is
     displayed.
+
+    Datasets with more than `SCATTER_MAX_POINTS` rows are aggregated server-side: the full
+    view is a density grid, and zooming in with the range sliders shows a stratified sample
+    of the points inside the window, so the chart payload stays bounded.
     """
     st.title("📈 Interactive Charts")
-    if "data" in st.session_state:
-        df = st.session_state["data"]
+    key, df = get_data()
+    if df is not None:
         numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
         
         if len(numeric_cols) >= 2:
             x_axis = st.selectbox("Select X-axis:", numeric_cols, index=0)
             y_axis = st.selectbox("Select Y-axis:", numeric_cols, index=1)
             
-            fig = px.scatter(df, x=x_axis, y=y_axis, title=f"{x_axis} vs {y_axis}")
-            st.plotly_chart(fig)
+            if len(df) <= SCATTER_MAX_POINTS:
+                fig = px.scatter(df, x=x_axis, y=y_axis, title=f"{x_axis} vs {y_axis}")
+                st.plotly_chart(fig)
+                return
+
+            summary = compute_statistics(key)
+            x_full = (float(summary[x_axis]["min"]), float(summary[x_axis]["max"]))
+            y_full = (float(summary[y_axis]["min"]), float(summary[y_axis]["max"]))
+            x_range = zoom_slider(f"Zoom {x_axis}:", x_full)
+            y_range = zoom_slider(f"Zoom {y_axis}:", y_full)
+
+            if x_range == x_full and y_range == y_full:
+                counts, x_centers, y_centers = compute_density(key, x_axis, y_axis, stats.DENSITY_BINS)
+                fig = go.Figure(go.Heatmap(
+                    x=x_centers, y=y_centers, z=np.where(counts > 0, counts, np.nan),
+                    colorscale="Viridis", colorbar_title="Points",
+                ))
+                fig.update_layout(title=f"{x_axis} vs {y_axis}", xaxis_title=x_axis, yaxis_title=y_axis)
+                st.plotly_chart(fig)
+                st.caption(
+                    f"{len(df):,} points aggregated into a {stats.DENSITY_BINS}×{stats.DENSITY_BINS} density grid. "
+                    "Narrow the zoom ranges to see individual points."
+                )
+            else:
+                sample = compute_sample(key, x_axis, y_axis, x_range, y_range, SCATTER_MAX_POINTS)
+                fig = px.scatter(sample, x=x_axis, y=y_axis, title=f"{x_axis} vs {y_axis}")
+                fig.update_layout(xaxis_range=list(x_range), yaxis_range=list(y_range))
+                st.plotly_chart(fig)
+                st.caption(f"Showing a stratified sample of {len(sample):,} points inside the zoom window.")
         else:
             st.warning("⚠️ The dataset must contain at least two numeric columns for visualization.")
     else:
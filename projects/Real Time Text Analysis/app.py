@@ -1,10 +1,18 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from collections import Counter
-import re
+import io
+from utils import figures, ingest, perf, text as textstats, workers
 
+PROJECT_TITLE = "Real Time Text Analysis"
+PROJECT_ORDER = 6
+PROJECT_HEAVY_IMPORTS = ["wordcloud"]
+
+WORDCLOUD_MAX_WORDS = 200
+WORDCLOUD_SIZE = (800, 400)
+WORDCLOUD_PREVIEW_SCALE = 4
+WORDCLOUD_POLL_SECONDS = 0.5
+
+@perf.timed("compute")
 def process_text(text):
     """
     Process the given text and return the word count, character count, word frequency,
@@ -27,14 +35,42 @@ def process_text(text):
     returned as a list of tuples, where the first element of each tuple is the
     word and the second element is the frequency of the word.
 
+    The text is analyzed by the session's `IncrementalAnalyzer`, which only
+    re-tokenizes the span that changed since the previous call, so the cost of a
+    keystroke does not grow with the length of the document.
+
+    """
+    analyzer = st.session_state.setdefault("text_analyzer", textstats.IncrementalAnalyzer())
+    analyzer.update(text)
+    return analyzer.word_count, analyzer.char_count, analyzer.word_freq, analyzer.top_words(5)
+
+def render_wordcloud(frequencies, width, height):
+    """
+    Draws a word cloud and encodes it as PNG bytes.
+
+    Parameters
+    ----------
+    frequencies : dict
+        The words to draw and their frequencies.
+    width : int
+        Width of the image in pixels.
+    height : int
+        Height of the image in pixels.
+
+    Returns
+    -------
+    bytes
+        The PNG image.
     """
-    words = re.findall(r'\b\w+\b', text.lower())
-    word_count = len(words)
-    char_count = len(text)
-    word_freq = Counter(words)
-    top_words = word_freq.most_common(5)
-    return word_count, char_count, word_freq, top_words
+    from wordcloud import WordCloud
 
+    wordcloud = WordCloud(width=width, height=height, background_color='white',
+                          max_words=len(frequencies)).generate_from_frequencies(frequencies)
+    buffer = io.BytesIO()
+    wordcloud.to_image().save(buffer, format="PNG")
+    return buffer.getvalue()
+
+@perf.timed("chart")
 def generate_wordcloud(word_freq):
     """
     Generates and displays a word cloud from a given word frequency dictionary.
@@ -46,28 +82,161 @@ def generate_wordcloud(word_freq):
 
     Notes
     -----
-    The word cloud is displayed using Streamlit's pyplot method, and it visualizes 
-    the frequency of words with their size in the cloud. Words with higher frequencies 
-    appear larger.
+    The word cloud visualizes the frequency of words with their size in the cloud.
+    Words with higher frequencies appear larger. Only the `WORDCLOUD_MAX_WORDS` most
+    frequent words are drawn, and the image is cached on a hash of that table and the
+    image size, so keystrokes that leave the top words unchanged reuse it.
+
+    When the full-size image is not cached yet, a low-resolution preview is shown and the
+    rerun returns while the full image renders on a background thread. A fragment checks
+    the figure cache every `WORDCLOUD_POLL_SECONDS` and swaps the preview for the full image
+    once it is there, without rerunning the page.
     """
+    top = dict(textstats.top_terms(word_freq, WORDCLOUD_MAX_WORDS))
+    table = figures.data_key(sorted(top.items()))
+    width, height = WORDCLOUD_SIZE
+    metrics = st.session_state.setdefault("figure_metrics", {})
+
+    key = ("wordcloud", table, width, height, "png")
+    image = figures.get(key, metrics)
+    if image is not None:
+        st.image(image, width=width)
+        return
 
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(word_freq)
-    fig, ax = plt.subplots()
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis("off")
-    st.pyplot(fig)
+    future = figures.submit(key, lambda: render_wordcloud(top, width, height), metrics)
+    preview_width, preview_height = width // WORDCLOUD_PREVIEW_SCALE, height // WORDCLOUD_PREVIEW_SCALE
+    preview = figures.cached(
+        ("wordcloud", table, preview_width, preview_height, "png"),
+        lambda: render_wordcloud(top, preview_width, preview_height),
+        metrics,
+    )
+
+    @st.fragment(run_every=WORDCLOUD_POLL_SECONDS)
+    def show_when_ready():
+        image = figures.get(key) if future.done() else None
+        if image is None:
+            st.image(preview, width=width, caption="Preview, rendering the full-size word cloud...")
+        else:
+            st.image(image, width=width)
+
+    show_when_ready()
+
+@perf.timed("compute")
+@st.cache_data(show_spinner=False, max_entries=16)
+def analyze_files(content_keys, remove_stop_words, n, top, _files, _workers=1, _on_chunk=None):
+    """
+    Computes the word statistics of uploaded documents by streaming them in blocks.
+
+    Parameters
+    ----------
+    content_keys : tuple
+        The content hashes of the files, which key the cache.
+    remove_stop_words : bool
+        Whether common English words are left out of the frequencies.
+    n : int
+        The n-gram length.
+    top : int
+        How many of the most frequent terms to return.
+    _files : list
+        The uploaded files, in the same order as `content_keys`.
+    _workers : int, optional
+        Worker processes counting the blocks. Defaults to 1 (this process).
+    _on_chunk : callable, optional
+        Called with the bytes read so far across all files.
+
+    Returns
+    -------
+    tuple
+        A tuple of (word_count, char_count, vocabulary_size, top_terms)
+
+    Notes
+    -----
+    Each file is analyzed by `textstats.analyze_stream`, so no file is decoded into a single
+    string, and the per-file frequencies are merged. N-grams never span two files. Only the
+    top terms are returned, so the cache does not hold the whole vocabulary.
+    """
+    executor = workers.get_process_pool() if _workers > 1 else None
+    stop_words = textstats.STOP_WORDS if remove_stop_words else frozenset()
+    word_count = char_count = done = 0
+    freq = None
+
+    for file in _files:
+        file.seek(0)
+        on_chunk = (lambda read, done=done: _on_chunk(done + read)) if _on_chunk else None
+        words, chars, file_freq, _ = textstats.analyze_stream(
+            file, stop_words=stop_words, n=n, top=0, executor=executor,
+            in_flight=_workers, on_chunk=on_chunk,
+        )
+        word_count += words
+        char_count += chars
+        done += file.size
+        if freq is None:
+            freq = file_freq
+        else:
+            freq.update(file_freq)
+
+    return word_count, char_count, len(freq), textstats.top_terms(freq, top)
+
+def show_files():
+    """
+    Displays the document mode: uploaded text files are analyzed in a worker pool, in blocks.
+
+    The user chooses whether to remove stop words, the n-gram length, the number of top terms
+    and the number of worker processes. The word and character counts, the vocabulary size,
+    the top terms and their word cloud are displayed.
+    """
+    files = st.file_uploader("Upload text files", type=["txt", "log", "md", "csv"], accept_multiple_files=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    remove_stop_words = col1.checkbox("Remove stop words")
+    n = col2.selectbox("N-gram size:", [1, 2, 3])
+    top = col3.slider("Top terms:", 5, 100, 20)
+    cpus = workers.max_workers()
+    worker_count = col4.number_input("Worker processes:", min_value=1, max_value=cpus, value=min(4, cpus))
+
+    if not files:
+        st.info("Upload one or more text files to start the analysis!")
+        return
+
+    total = sum(file.size for file in files) or 1
+    progress = st.progress(0.0, text="Analyzing...")
+    word_count, char_count, vocabulary, top_terms = analyze_files(
+        tuple(ingest.upload_hash(file) for file in files), remove_stop_words, n, top, files,
+        _workers=int(worker_count),
+        _on_chunk=lambda read: progress.progress(min(read / total, 1.0), text=f"Analyzed {read / 2**20:,.1f} MB..."),
+    )
+    progress.empty()
+
+    st.subheader("📌 Statistics")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Words", f"{word_count:,}")
+    col2.metric("Characters", f"{char_count:,}")
+    col3.metric("Distinct terms", f"{vocabulary:,}")
+
+    st.subheader(f"🔝 Top {top} Most Frequent Terms")
+    st.table(pd.DataFrame(top_terms, columns=["Term", "Frequency"]))
+
+    if top_terms:
+        st.subheader("☁️ Word Cloud")
+        generate_wordcloud(dict(top_terms))
 
 def show():
     """
     Displays a Streamlit app with a text area for the user to enter their text.
     The app then displays statistics about the text, including the number of words and characters.
     It also displays a table of the top 5 most frequent words and a word cloud visualization of the text.
+
+    In document mode, uploaded text files are analyzed instead, see `show_files`.
     """
     st.title("📊 Real-Time Text Analysis")
+    if st.radio("Input:", ["Type text", "Upload documents"], horizontal=True) == "Upload documents":
+        show_files()
+        return
+
     text = st.text_area("Enter your text here:")
     
     if text:
-        word_count, char_count, word_freq, top_words = process_text(text)
+        word_count, char_count, _, top_words = process_text(text)
         
         st.subheader("📌 Statistics")
         st.write(f"Words: {word_count}")
@@ -78,7 +247,7 @@ def show():
         st.table(df)
         
         st.subheader("☁️ Word Cloud")
-        generate_wordcloud(word_freq)
+        generate_wordcloud(dict(st.session_state["text_analyzer"].top_words(WORDCLOUD_MAX_WORDS)))
     else:
         st.info("Enter some text to start the analysis!")
 
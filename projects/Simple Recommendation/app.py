@@ -1,58 +1,274 @@
+import heapq
+import time
+from collections import namedtuple
+from operator import itemgetter
+
 import streamlit as st
 import pandas as pd
-import random
-import matplotlib.pyplot as plt
+import numpy as np
+from utils import datasets, figures, perf, similarity, store
+
+PROJECT_TITLE = "Simple Recommendation"
+PROJECT_ORDER = 7
+PROJECT_HEAVY_IMPORTS = ["plotly.express"]
+
+CSV_PATH = "data/movies.csv"
+MAX_SEARCH_RESULTS = 50
+
+GenreIndex = namedtuple("GenreIndex", ["movies", "ratings", "spans"])
+GenreIndex.__doc__ = """
+Movies grouped by genre and sorted by decreasing rating within each genre.
+
+Attributes:
+    movies (np.ndarray): The movie titles, genre by genre.
+    ratings (np.ndarray): The ratings, in the same order.
+    spans (dict): The (start, end) positions of each genre in the arrays.
+"""
 
-def get_recommendations(selected_genres, num_recommendations, csv_path="data/movies.csv"):
+def build_genre_index(df):
     """
-    Generates a dictionary of movie recommendations with actual ratings based on selected genres.
+    Sorts the movies by genre, then by decreasing rating, keeping file order among equal ratings.
 
     Args:
-        selected_genres (list): A list of genres to filter movies by.
-        num_recommendations (int): The number of recommendations to return.
-        csv_path (str, optional): The file path of the CSV containing movie data. Defaults to "data/movies.csv".
+        df (pd.DataFrame): The movies, with 'Genre', 'Movie' and 'Rating' columns.
 
     Returns:
-        dict: A dictionary where keys are movie titles and values are their ratings.
+        GenreIndex: The sorted movies and the span of each genre.
+    """
+    genres = df["Genre"].astype("category")
+    codes = genres.cat.codes.to_numpy()
+    ratings = df["Rating"].to_numpy(dtype=float)
+    order = np.lexsort((-ratings, codes))
+
+    sorted_codes = codes[order]
+    bounds = np.searchsorted(sorted_codes, np.arange(len(genres.cat.categories) + 1))
+    spans = {
+        genre: (int(bounds[code]), int(bounds[code + 1]))
+        for code, genre in enumerate(genres.cat.categories)
+        if bounds[code] < bounds[code + 1]
+    }
+    return GenreIndex(df["Movie"].to_numpy(dtype=object)[order], ratings[order], spans)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_genre_index(csv_path, signature, _dataset):
+    """
+    Builds the genre index of the movies once per file version and shares it across sessions.
+
+    Args:
+        csv_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset, so a new version gets a new index.
+        _dataset (datasets.Dataset): The dataset to index (not hashed).
+
+    Returns:
+        GenreIndex: The movies sorted by rating within each genre.
 
     Raises:
         ValueError: If the CSV file does not contain the required 'Genre', 'Movie', and 'Rating' columns.
     """
-    df = pd.read_csv(csv_path)
-
+    df = _dataset.frame
     if not all(col in df.columns for col in ["Genre", "Movie", "Rating"]):
         raise ValueError("CSV file must contain 'Genre', 'Movie', and 'Rating' columns.")
+    return build_genre_index(df)
+
+def top_rated(index, genres, n):
+    """
+    Returns the n best-rated movies of several genres with a k-way merge of their sorted lists.
+
+    Only the first n distinct movies are read from the merge, so the cost depends on n and the
+    number of genres, not on the size of the catalog. A movie listed under several of the genres
+    keeps its highest rating.
+
+    Args:
+        index (GenreIndex): The genre index.
+        genres (list): The genres to merge. Genres missing from the index are ignored.
+        n (int): The number of movies to return.
+
+    Returns:
+        dict: Movie titles mapped to their ratings, in decreasing order of rating.
+    """
+    def ranked(start, end):
+        for position in range(start, end):
+            yield index.ratings[position], index.movies[position]
 
+    streams = [ranked(*index.spans[genre]) for genre in genres if genre in index.spans]
     recommendations = {}
+    for rating, movie in heapq.merge(*streams, key=itemgetter(0), reverse=True):
+        if len(recommendations) == n:
+            break
+        recommendations.setdefault(movie, float(rating))
+    return recommendations
 
-    for genre in selected_genres:
-        genre_movies = df[df["Genre"] == genre][["Movie", "Rating"]].values
-        for movie, rating in genre_movies:
-            recommendations[movie] = rating
-    
-    sorted_recommendations = dict(sorted(recommendations.items(), key=lambda item: item[1], reverse=True))
-    return dict(list(sorted_recommendations.items())[:num_recommendations])
+@perf.timed("compute")
+def get_recommendations(selected_genres, num_recommendations, csv_path=CSV_PATH):
+    """
+    Generates a dictionary of movie recommendations with actual ratings based on selected genres.
 
+    The movies come from the genre index of the current version of the file, which is rebuilt
+    when the file's modification time or size changes.
+
+    Args:
+        selected_genres (list): A list of genres to filter movies by.
+        num_recommendations (int): The number of recommendations to return.
+        csv_path (str, optional): The file path of the CSV containing movie data. Defaults to "data/movies.csv".
+
+    Returns:
+        dict: A dictionary where keys are movie titles and values are their ratings.
+
+    Raises:
+        ValueError: If the CSV file does not contain the required 'Genre', 'Movie', and 'Rating' columns.
+    """
+    dataset = datasets.load_dataset(csv_path, categorical=["Genre"])
+    index = get_genre_index(csv_path, dataset.signature, dataset)
+    return top_rated(index, selected_genres, num_recommendations)
+
+@perf.timed("chart")
 def plot_scores(recommendations):
     """
     Plots a horizontal bar chart of the recommended movies and their scores.
 
     The x-axis represents the scores and the y-axis represents the movie titles.
-    The chart is sorted in descending order of the scores.
+    The chart is sorted in descending order of the scores. It is a native Plotly chart,
+    or a cached matplotlib image when `CHART_BACKEND=matplotlib`.
 
     Args:
         recommendations (dict): A dictionary where keys are movie titles and values are their scores.
     """
     df = pd.DataFrame(list(recommendations.items()), columns=["Movie", "Score"])
     df = df.sort_values(by="Score", ascending=False)
-    
-    fig, ax = plt.subplots()
-    ax.barh(df["Movie"], df["Score"], color='skyblue')
-    ax.set_xlabel("Score")
-    ax.set_ylabel("Movies")
-    ax.set_title("Recommended Movies and Their Scores")
-    plt.gca().invert_yaxis()
-    st.pyplot(fig)
+    metrics = st.session_state.setdefault("figure_metrics", {})
+
+    if figures.native_charts():
+        import plotly.express as px
+
+        fig = px.bar(df, x="Score", y="Movie", orientation="h", title="Recommended Movies and Their Scores",
+                     color_discrete_sequence=["skyblue"], labels={"Movie": "Movies"})
+        fig.update_yaxes(autorange="reversed")
+        st.plotly_chart(fig)
+        figures.record(metrics, "native")
+        return
+
+    def draw(fig, ax):
+        ax.barh(df["Movie"], df["Score"], color='skyblue')
+        ax.set_xlabel("Score")
+        ax.set_ylabel("Movies")
+        ax.set_title("Recommended Movies and Their Scores")
+        ax.invert_yaxis()
+
+    key = figures.data_key(df["Movie"].tolist(), df["Score"])
+    st.image(figures.render_matplotlib(draw, key, 640, 480, metrics=metrics))
+
+@perf.timed("compute")
+@st.cache_resource(max_entries=4, show_spinner="Building the similarity index...")
+def get_similarity_index(csv_path, signature, _dataset):
+    """
+    Embeds the movies as feature vectors and builds their similarity index, once per file version.
+
+    The vectors are stored next to the columnar copies of the datasets and memory-mapped, so a
+    restarted server maps the existing file instead of encoding the catalog again.
+
+    Args:
+        csv_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset, so a new version gets a new index.
+        _dataset (datasets.Dataset): The dataset to index (not hashed).
+
+    Returns:
+        tuple: The sorted movie titles, the `similarity.VectorIndex` over their vectors, and the
+               seconds the build took.
+    """
+    start = time.perf_counter()
+    df = _dataset.frame
+    key = f"{store.file_key(csv_path)}-vectors"
+    ids = np.unique(df["Movie"].astype(str).to_numpy())
+    matrix = similarity.load_matrix(key)
+    if matrix is None or len(matrix) != len(ids):
+        ids, matrix, _ = similarity.encode_features(df, "Movie")
+        try:
+            similarity.save_matrix(key, matrix)
+            matrix = similarity.load_matrix(key)
+        except OSError:
+            pass
+    index = similarity.VectorIndex(matrix)
+    return ids, index, time.perf_counter() - start
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_title_search(csv_path, signature, _ids):
+    """
+    Sorts the lowercased movie titles once per file version, for prefix search.
+
+    Args:
+        csv_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset.
+        _ids (np.ndarray): The sorted movie titles of the similarity index (not hashed).
+
+    Returns:
+        tuple: The lowercased titles in sorted order, and their positions in `_ids`.
+    """
+    lowered = np.char.lower(_ids.astype(str))
+    order = np.argsort(lowered, kind="stable")
+    return lowered[order], order
+
+def search_titles(search, ids, text, limit=MAX_SEARCH_RESULTS):
+    """Returns at most `limit` titles starting with a text, ignoring case, found with two binary searches."""
+    lowered, order = search
+    text = text.strip().lower()
+    if not text:
+        return []
+    start = np.searchsorted(lowered, text, side="left")
+    end = np.searchsorted(lowered, text + "\U0010ffff", side="left")
+    return ids[order[start:min(end, start + limit)]].tolist()
+
+def show_similar(num_recommendations):
+    """
+    Recommends the movies most similar to the ones the user likes, by cosine similarity of their features.
+
+    Movies are picked from a title search that lists at most `MAX_SEARCH_RESULTS` matches,
+    so the catalog is never sent to the browser. Liked titles that are no longer in the
+    catalog, e.g. after the dataset changed, are dropped. The search is exact, scoring every movie in
+    blocks, or approximate, scoring only the movies that share an LSH bucket with the query. The build time, the query time and the number of
+    movies scored are reported.
+
+    Args:
+        num_recommendations (int): The number of recommendations to return.
+    """
+    dataset = datasets.load_dataset(CSV_PATH, categorical=["Genre"])
+    ids, index, build_seconds = get_similarity_index(CSV_PATH, dataset.signature, dataset)
+
+    liked = np.asarray(st.session_state.get("liked_movies", []), dtype=str)
+    liked = liked[np.isin(liked, ids)].tolist()
+    text = st.text_input("Search movies:", placeholder="Type the start of a title")
+    matches = search_titles(get_title_search(CSV_PATH, dataset.signature, ids), ids, text)
+    liked = st.multiselect("Movies you like:", sorted(set(liked) | set(matches)), default=liked)
+    st.session_state["liked_movies"] = liked
+    method = st.radio("Search:", ["Exact", "Approximate (LSH)"], horizontal=True)
+    if not liked:
+        st.info("Please select at least one movie to get recommendations.")
+        return
+
+    rows = np.searchsorted(ids, liked)
+    query = similarity.query_vector(index.matrix, rows)
+    start = time.perf_counter()
+    if method == "Exact":
+        found, scores = index.exact(query, num_recommendations, exclude=rows)
+        scored = len(ids)
+    else:
+        found, scores, scored = index.approximate(query, num_recommendations, exclude=rows)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    recommendations = dict(zip(ids[found].tolist(), np.round(scores, 3).tolist()))
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Index build", f"{build_seconds:.2f} s")
+    col2.metric("Query", f"{query_ms:.1f} ms")
+    col3.metric("Movies scored", f"{scored:,} of {len(ids):,}")
+
+    st.subheader("🎥 Recommended Movies")
+    st.table(pd.DataFrame(recommendations.items(), columns=["Movie", "Similarity"]))
+    st.subheader("📊 Recommendation Scores")
+    plot_scores(recommendations)
+
+def warm():
+    """Loads the movies dataset and its genre index into the caches so the first visit skips building them."""
+    dataset = datasets.load_dataset(CSV_PATH, categorical=["Genre"])
+    get_genre_index(CSV_PATH, dataset.signature, dataset)
 
 def show():
     """
@@ -61,9 +277,16 @@ def show():
     Users can select their favorite movie genres from a list, specify the number of recommendations,
     and generate movie recommendations with random scores. The recommendations are sorted by score
     and displayed in a table and a bar chart.
+
+    In the "More like these" mode, users pick movies they like instead, see `show_similar`.
     """
     st.title("🎬 Simple Recommendation System")
 
+    mode = st.radio("Recommend:", ["By genre", "More like these"], horizontal=True)
+    if mode == "More like these":
+        show_similar(st.slider("Number of recommendations:", 1, 20, 5))
+        return
+
     st.subheader("Select Your Favorite Movie Genres")
     genres = ["Action", "Comedy", "Drama", "Sci-Fi", "Horror"]
     selected_genres = st.multiselect("Choose genres:", genres)
@@ -1,14 +1,31 @@
+import asyncio
 import os
+import time
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.express as px
 from dotenv import load_dotenv
+from utils import perf, weather
+
+PROJECT_TITLE = "Weather App"
+PROJECT_ORDER = 10
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
-URL = "http://api.openweathermap.org/data/2.5/weather"
+LOCATIONS_PATH = os.path.join("data", "geographic_data.csv")
+TABLE_REFRESH_SECONDS = 0.25
+
+@st.cache_resource
+def get_client():
+    """
+    Returns the weather client shared by every session, created on first use.
 
+    Sharing it lets sessions reuse pooled connections and each other's cached responses.
+    The endpoint and cache TTL are read from `WEATHER_API_URL` and `WEATHER_CACHE_TTL`.
+    """
+    return weather.WeatherClient(API_KEY, weather.api_url(), ttl=weather.cache_ttl())
+
+@perf.timed("network")
 def get_weather_data(city, country="us"):
     """
     Fetches weather data from the OpenWeatherMap API for a specified city and country.
@@ -21,21 +38,91 @@ def get_weather_data(city, country="us"):
         dict: A dictionary containing weather data such as temperature, humidity,
               and weather description if the request is successful.
               If the request fails, a dictionary with an error message is returned.
+
+    Requests go through the shared `weather.WeatherClient`, so they reuse pooled
+    connections, time out instead of hanging, and recent answers come from its cache.
     """
-    params = {
-        "q": f"{city},{country}",
-        "appid": API_KEY,
-        "units": "metric",
-        "lang": "en"
+    return get_client().get(city, country)
+
+def weather_row(city, country, data, seconds):
+    """Flattens a weather response into a table row, with the error message if the request failed."""
+    row = {"City": city, "Country": country.upper(), "Time (ms)": round(seconds * 1000, 1)}
+    if "error" in data:
+        return {**row, "Error": data["error"]}
+    return {
+        **row,
+        "Temperature (°C)": data["main"]["temp"],
+        "Min (°C)": data["main"]["temp_min"],
+        "Max (°C)": data["main"]["temp_max"],
+        "Humidity (%)": data["main"]["humidity"],
+        "Condition": data["weather"][0]["description"].capitalize(),
     }
-    
-    response = requests.get(URL, params=params)
-    
-    if response.status_code == 200:
-        return response.json()
-    else:
-        error_msg = response.json().get("message", "Unknown error")
-        return {"error": f"Error {response.status_code}: {error_msg}"}
+
+def read_locations(uploaded_file):
+    """
+    Lets the user pick the city and country columns of a CSV, by default the bundled geographic data.
+
+    Args:
+        uploaded_file: An uploaded CSV file, or None for `LOCATIONS_PATH`.
+
+    Returns:
+        list: Distinct (city, country) pairs, in file order. The country is empty when no column is chosen.
+    """
+    df = pd.read_csv(uploaded_file if uploaded_file is not None else LOCATIONS_PATH)
+    columns = df.columns.tolist()
+    col1, col2 = st.columns(2)
+    city_column = col1.selectbox("City column:", columns, index=columns.index("name") if "name" in columns else 0)
+    country_column = col2.selectbox("Country column:", ["(none)"] + columns)
+
+    cities = df[city_column].astype(str).str.strip()
+    countries = df[country_column].astype(str).str.strip() if country_column != "(none)" else pd.Series("", index=df.index)
+    locations = pd.DataFrame({"city": cities, "country": countries})
+    locations = locations[locations["city"].ne("") & df[city_column].notna()].drop_duplicates()
+    return list(locations.itertuples(index=False, name=None))
+
+def show_bulk():
+    """
+    Displays the bulk mode: the weather of every location in a CSV column, fetched concurrently.
+
+    Rows are added to the table as responses arrive, so fast locations show up without waiting
+    for the slowest ones. The concurrency, up to the client's connection pool size, and the
+    request rate are limited by the user.
+    """
+    uploaded_file = st.file_uploader("Upload a CSV of locations (defaults to the bundled geographic data)", type=["csv"])
+    locations = read_locations(uploaded_file)
+
+    pool_size = get_client().pool_size
+    col1, col2 = st.columns(2)
+    concurrency = col1.slider("Concurrent requests:", 1, pool_size, min(weather.BULK_CONCURRENCY, pool_size))
+    rate = col2.slider("Requests per second (0 = unlimited):", 0, 500, int(weather.BULK_RATE))
+
+    if not st.button(f"Fetch {len(locations)} locations"):
+        return
+
+    progress = st.progress(0.0)
+    table = st.empty()
+    rows = []
+    last_refresh = 0.0
+
+    def on_result(position, data, seconds):
+        nonlocal last_refresh
+        city, country = locations[position]
+        rows.append(weather_row(city, country, data, seconds))
+        now = time.perf_counter()
+        if now - last_refresh >= TABLE_REFRESH_SECONDS or len(rows) == len(locations):
+            last_refresh = now
+            progress.progress(len(rows) / len(locations), text=f"{len(rows)} of {len(locations)} locations")
+            table.dataframe(pd.DataFrame(rows), width="stretch")
+
+    start = time.perf_counter()
+    with perf.stage("network"):
+        asyncio.run(weather.fetch_many(get_client(), locations, concurrency, rate, on_result))
+    elapsed = time.perf_counter() - start
+
+    errors = sum("Error" in row for row in rows)
+    sequential = sum(row["Time (ms)"] for row in rows) / 1000
+    st.caption(f"Fetched {len(rows)} locations in {elapsed:.2f} s "
+               f"(the calls add up to {sequential:.2f} s); {errors} failed.")
 
 def show():
     """
@@ -47,9 +134,17 @@ def show():
 
     If the API request fails, an error message is displayed. Otherwise, the application shows the weather
     metrics as text and visualizes them using a bar chart.
+
+    In the "Many cities" mode, a list of locations is fetched at once instead, see `show_bulk`.
     """
     st.title("🌤 Weather Forecast")
 
+    if st.radio("Mode:", ["Single city", "Many cities"], horizontal=True) == "Many cities":
+        show_bulk()
+        with st.expander("Client metrics"):
+            st.json(get_client().metrics())
+        return
+
     city = st.text_input("Enter the city name:", "")
     country = st.text_input("Enter the country code (e.g., 'us' for the United States):", "")
 
@@ -78,3 +173,6 @@ def show():
             )
             fig = px.bar(df, x="Metric", y="Value", color="Metric", title="Weather Metrics")
             st.plotly_chart(fig)
+
+    with st.expander("Client metrics"):
+        st.json(get_client().metrics())
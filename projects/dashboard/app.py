@@ -1,6 +1,59 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from utils import ingest, perf, stats
+
+PROJECT_TITLE = "Analysis Dashboard"
+PROJECT_ORDER = 1
+
+@perf.timed("load")
+def load_upload(uploaded_file):
+    """
+    Loads an uploaded CSV file, showing progress and running statistics while it is parsed.
+
+    The file is parsed in chunks with compact dtypes and cached by content hash, so reruns
+    and re-uploads of the same file skip parsing and show no progress at all.
+
+    Args:
+        uploaded_file: The Streamlit `UploadedFile` to load.
+
+    Returns:
+        tuple: The content hash of the upload and the parsed data.
+    """
+    progress = st.empty()
+    preview = st.empty()
+    running = {}
+
+    def on_chunk(chunk, rows_read, fraction):
+        for column in chunk.select_dtypes(include=['number']).columns:
+            running.setdefault(column, stats.StreamingSummary()).update(chunk[column].to_numpy(dtype=float))
+        text = f"Reading file... {rows_read:,} rows"
+        progress.progress(fraction if fraction is not None else 0.0, text=text)
+        if running:
+            preview.dataframe(pd.DataFrame({column: summary.describe() for column, summary in running.items()}))
+
+    key, df = ingest.load_csv(uploaded_file, on_chunk=on_chunk)
+    progress.empty()
+    preview.empty()
+    return key, df
+
+@perf.timed("compute")
+@st.cache_data(show_spinner=False, max_entries=64)
+def column_profile(content_key, column, _df):
+    """
+    Computes the statistics and histogram bins of a column in one pass, cached per upload and column.
+
+    Args:
+        content_key (str): The content hash of the upload the frame was parsed from.
+        column (str): The numeric column to profile.
+        _df (pd.DataFrame): The parsed data (not hashed).
+
+    Returns:
+        tuple: The `describe()`-style statistics (with approximate quartiles) and the
+               non-empty histogram bins as a DataFrame.
+    """
+    summary = stats.profile(_df[column].to_numpy(dtype=float))
+    return summary.describe(), summary.histogram.to_frame()
 
 def show():
     """
@@ -8,6 +61,10 @@ def show():
     statistics for a selected numeric column (mean, median, standard deviation).
     Also displays a histogram of the selected column.
 
+    Uploads are parsed in chunks; while a new file loads, a progress bar and preliminary
+    statistics of the rows read so far are shown. The column statistics and histogram bins
+    are computed server-side in one pass, so the chart receives bin counts rather than rows.
+
     If the uploaded file does not contain any numeric columns, a warning message
     is displayed. If no file is uploaded, an information message is displayed.
     """
@@ -16,22 +73,21 @@ def show():
     uploaded_file = st.file_uploader("Upload a CSV file", type=["csv"])
     
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        key, df = load_upload(uploaded_file)
         st.subheader("Data Preview")
         st.dataframe(df.head())
 
         numeric_columns = df.select_dtypes(include=['number']).columns.tolist()
         if numeric_columns:
             column = st.selectbox("Select a numeric column", numeric_columns)
-            mean_value = df[column].mean()
-            median_value = df[column].median()
-            std_value = df[column].std()
+            description, histogram = column_profile(key, column, df)
 
-            st.markdown(f"**Mean:** {mean_value:.2f}")
-            st.markdown(f"**Median:** {median_value:.2f}")
-            st.markdown(f"**Standard Deviation:** {std_value:.2f}")
+            st.markdown(f"**Mean:** {description['mean']:.2f}")
+            st.markdown(f"**Median:** {description['50%']:.2f}")
+            st.markdown(f"**Standard Deviation:** {description['std']:.2f}")
 
-            fig = px.histogram(df, x=column, nbins=30, title=f"Distribution of {column}")
+            fig = px.bar(histogram, x="bin_center", y="count", title=f"Distribution of {column}")
+            fig.update_layout(bargap=0, xaxis_title=column)
             st.plotly_chart(fig)
         else:
             st.warning("The file does not contain numeric columns.")
@@ -1,56 +1,136 @@
 import streamlit as st
-import pandas as pd
+import numpy as np
 import os
+from utils import datasets, filters, perf, stats
 
+PROJECT_TITLE = "Dynamic Table Filter"
+PROJECT_ORDER = 2
+
+DATA_PATH = os.path.join('data', 'example_data.csv')
+CATEGORICAL_COLUMNS = ['City', 'Category']
+NUMERIC_COLUMNS = ['Price', 'Quantity']
+PAGE_SIZES = [25, 50, 100, 500]
+
+@perf.timed("load")
 def load_data():
     """Loads data from a CSV file located in the 'data' directory.
 
+    The file is parsed once per modification through the shared dataset cache, with
+    City and Category stored as categoricals and their facet values and the numeric
+    ranges precomputed.
+
     Returns:
-        pd.DataFrame: The DataFrame containing the data from the CSV file.
-        If the file is not found, an error message is displayed and an
-        empty DataFrame is returned.
+        datasets.Dataset: The cached dataset with its typed DataFrame, facets and ranges.
+        If the file is not found, an error message is displayed and None is returned.
     """
-    file_path = os.path.join('data', 'example_data.csv')
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        return df
+    if os.path.exists(DATA_PATH):
+        return datasets.load_dataset(DATA_PATH, categorical=CATEGORICAL_COLUMNS)
     else:
         st.error("Arquivo CSV não encontrado na pasta 'data'.")
-        return pd.DataFrame()
+        return None
+
+@perf.timed("compute")
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_filter_index(file_path, signature, _dataset):
+    """
+    Builds the filter index of a dataset once per file version and shares it across sessions.
+
+    Args:
+        file_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset, so a new version gets a new index.
+        _dataset (datasets.Dataset): The dataset to index (not hashed).
+
+    Returns:
+        filters.FilterIndex: The index over the categorical and numeric filter columns.
+    """
+    return filters.FilterIndex(_dataset.frame, categorical=CATEGORICAL_COLUMNS, numeric=NUMERIC_COLUMNS)
+
+@perf.timed("compute")
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_partition_stats(file_path, signature, _dataset):
+    """
+    Precomputes the per-partition aggregates of the numeric columns once per file version.
+
+    Args:
+        file_path (str): The path the dataset was loaded from.
+        signature (tuple): The file signature of the dataset, so a new version gets new aggregates.
+        _dataset (datasets.Dataset): The dataset to summarize (not hashed).
+
+    Returns:
+        stats.PartitionedStats: The partition aggregates of the numeric columns.
+    """
+    return stats.PartitionedStats(_dataset.frame, NUMERIC_COLUMNS)
+
+def warm():
+    """Loads the dataset, its filter index and its aggregates into the cache so the first visit skips them."""
+    if os.path.exists(DATA_PATH):
+        dataset = datasets.load_dataset(DATA_PATH, categorical=CATEGORICAL_COLUMNS)
+        get_filter_index(DATA_PATH, dataset.signature, dataset)
+        get_partition_stats(DATA_PATH, dataset.signature, dataset)
 
 def show():
     """
     Displays an interactive table with filters by city, category, price range, and quantity range.
 
     The user can select one or more cities, categories, and a price and quantity range to filter the data.
-    The filtered data is then displayed in a table, along with summary statistics.
+    The filtered data is then displayed one page at a time, optionally sorted by a column, along with
+    summary statistics.
+
+    Filtering goes through a shared `filters.FilterIndex`, and the bitmap of each widget is kept
+    in the session state, so changing one widget only re-evaluates that widget's predicate.
+    Only the current page is sent to the browser, and the statistics are merged from cached
+    per-partition aggregates instead of running `describe()` over the filtered rows.
 
-    If the data file is not found, an error message is displayed and an empty DataFrame is returned.
+    If the data file is not found, an error message is displayed and the function exits early.
     """
     st.title("📊 Dynamic Table Filter")
     
-    df = load_data()
+    dataset = load_data()
     
-    if df.empty:
+    if dataset is None or dataset.frame.empty:
         return
     
+    df = dataset.frame
+    cities = dataset.facets['City']
+    categories = dataset.facets['Category']
+    price_min, price_max = (int(value) for value in dataset.ranges['Price'])
+    quantity_min, quantity_max = (int(value) for value in dataset.ranges['Quantity'])
+
     st.sidebar.header("Filters")
     
-    selected_cities = st.sidebar.multiselect("Select City:", options=df['City'].unique(), default=df['City'].unique())
+    selected_cities = st.sidebar.multiselect("Select City:", options=cities, default=cities)
     
-    selected_categories = st.sidebar.multiselect("Select Category:", options=df['Category'].unique(), default=df['Category'].unique())
+    selected_categories = st.sidebar.multiselect("Select Category:", options=categories, default=categories)
     
-    price_range = st.sidebar.slider("Select Price Range:", int(df['Price'].min()), int(df['Price'].max()), (int(df['Price'].min()), int(df['Price'].max())))
+    price_range = st.sidebar.slider("Select Price Range:", price_min, price_max, (price_min, price_max))
     
-    quantity_range = st.sidebar.slider("Select Quantity Range:", int(df['Quantity'].min()), int(df['Quantity'].max()), (int(df['Quantity'].min()), int(df['Quantity'].max())))
+    quantity_range = st.sidebar.slider("Select Quantity Range:", quantity_min, quantity_max, (quantity_min, quantity_max))
     
-    filtered_df = df[(df['City'].isin(selected_cities)) &
-                     (df['Category'].isin(selected_categories)) &
-                     (df['Price'].between(price_range[0], price_range[1])) &
-                     (df['Quantity'].between(quantity_range[0], quantity_range[1]))]
+    index = get_filter_index(DATA_PATH, dataset.signature, dataset)
+    predicates = {
+        "city": ("isin", 'City', frozenset(selected_cities)),
+        "category": ("isin", 'Category', frozenset(selected_categories)),
+        "price": ("between", 'Price', tuple(price_range)),
+        "quantity": ("between", 'Quantity', tuple(quantity_range)),
+    }
+    mask = filters.apply_filters(index, predicates, st.session_state.setdefault("filter_masks", {}))
+    matches = int(np.count_nonzero(mask))
     
     st.subheader("Filtered Data")
-    st.dataframe(filtered_df)
+    controls = st.columns(4)
+    sort_column = controls[0].selectbox("Sort by:", ["(none)"] + CATEGORICAL_COLUMNS + NUMERIC_COLUMNS)
+    descending = controls[1].checkbox("Descending")
+    page_size = controls[2].selectbox("Rows per page:", PAGE_SIZES, index=1)
+    pages = max(1, -(-matches // page_size))
+    page = controls[3].number_input(f"Page (of {pages}):", min_value=1, max_value=pages, value=1, step=1)
+
+    rows = filters.page_rows(
+        index, mask, page - 1, page_size,
+        sort_column=None if sort_column == "(none)" else sort_column, descending=descending,
+    )
+    st.dataframe(df.iloc[rows])
+    st.caption(f"Showing {len(rows)} of {matches:,} matching rows.")
 
     st.subheader("Summary Statistics")
-    st.write(filtered_df.describe())
+    partition_stats = get_partition_stats(DATA_PATH, dataset.signature, dataset)
+    st.write(partition_stats.describe(mask, st.session_state.setdefault("filter_stats", {})))
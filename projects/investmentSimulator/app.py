@@ -1,6 +1,78 @@
+import functools
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+from utils import perf, workers
+
+PROJECT_TITLE = "Investment Simulator"
+PROJECT_ORDER = 3
+
+COMPOUNDING_FREQUENCIES = {"Daily": 365, "Monthly": 12, "Yearly": 1}
+CONTRIBUTION_FREQUENCIES = {"Monthly": 12, "Yearly": 1}
+CHART_POINTS_PER_YEAR = 12
+
+MONTE_CARLO_STEPS_PER_YEAR = 12
+MONTE_CARLO_CHUNK_PATHS = 10_000
+MONTE_CARLO_BAND_POINTS = 60
+PERCENTILES = [5, 25, 50, 75, 95]
+
+@perf.timed("compute")
+def simulate_growth(principal, rates, years, periods_per_year=365, contribution=0.0, contributions_per_year=12):
+    """
+    Calculates compound interest growth for one or more annual rates in a single vectorized pass.
+
+    The balance after period k is `G_k * (principal + sum(d_j / G_j for j <= k))`, where
+    `G_k = (1 + rate / periods_per_year) ** k` and `d_j` is the total contributed at the end
+    of period j (contributions falling inside a period are credited at its end), so the
+    whole series is one power and one cumulative sum per scenario.
+
+    Args:
+        principal (float): The initial amount of money invested.
+        rates (float or array-like): One annual interest rate or a batch of them (as decimals).
+        years (int): The investment period in years.
+        periods_per_year (int, optional): Compounding periods per year. Defaults to 365 (daily).
+        contribution (float, optional): Amount added at each contribution date. Defaults to 0.
+        contributions_per_year (int, optional): Number of contributions per year. Defaults to 12.
+
+    Returns:
+        tuple: A 2-D array of investment values with one row per rate and one column per
+               compounding period (including period 0), and a 1-D array with the time of each
+               column in years.
+    """
+    rates = np.atleast_1d(np.asarray(rates, dtype=float))
+    periods = years * periods_per_year
+    steps = np.arange(periods + 1)
+
+    growth = (1 + rates[:, None] / periods_per_year) ** steps
+
+    deposits = np.zeros(periods + 1)
+    if contribution and contributions_per_year:
+        dates = np.arange(1, years * contributions_per_year + 1) * periods_per_year / contributions_per_year
+        np.add.at(deposits, np.ceil(dates).astype(int), contribution)
+
+    values = growth * (principal + np.cumsum(deposits / growth, axis=1))
+    return values, steps / periods_per_year
+
+def downsample(values, times, periods_per_year, points_per_year=CHART_POINTS_PER_YEAR):
+    """
+    Keeps only the period-end points of a growth series, e.g. month-end values of a daily series.
+
+    Args:
+        values (np.ndarray): The 2-D array returned by `simulate_growth`.
+        times (np.ndarray): The time of each column in years.
+        periods_per_year (int): Compounding periods per year used to build the series.
+        points_per_year (int, optional): Points to keep per year. Defaults to 12.
+
+    Returns:
+        tuple: The reduced values and times. The first and last points are always kept.
+    """
+    if periods_per_year <= points_per_year:
+        return values, times
+    points = int(round(times[-1] * points_per_year))
+    index = np.round(np.arange(points + 1) * periods_per_year / points_per_year).astype(int)
+    return values[:, index], times[index]
 
 def calculate_compound_interest_daily(principal, rate, years):
     """
@@ -14,32 +86,165 @@ def calculate_compound_interest_daily(principal, rate, years):
     Returns:
         tuple: A tuple containing a list of investment values at each day and a list of corresponding days.
     """
-    days = years * 365
-    daily_rate = rate / 365
-    amounts = [principal * (1 + daily_rate) ** day for day in range(days + 1)]
-    return amounts, list(range(days + 1))
+    values, _ = simulate_growth(principal, rate, years)
+    return values[0].tolist(), list(range(values.shape[1]))
 
-def show():
+def simulate_paths(paths, seed, principal, rate, volatility, steps, index):
     """
-    Displays an investment growth simulator that calculates daily compound interest over time.
+    Simulates a chunk of log-normal return paths with monthly steps.
 
-    The user can input an initial investment amount, an annual interest rate, and an investment period (in years).
+    Args:
+        paths (int): Number of paths in this chunk.
+        seed (np.random.SeedSequence): Seed of this chunk, so chunks are independent and reproducible.
+        principal (float): The initial amount of money invested.
+        rate (float): The expected annual return (as a decimal).
+        volatility (float): The annual volatility of returns (as a decimal).
+        steps (int): Total number of monthly steps.
+        index (np.ndarray): Step numbers (1-based) whose values are kept.
 
-    The output will display the daily investment growth over the specified period, and the final investment value after the specified period.
+    Returns:
+        np.ndarray: A float32 array with one row per path and one column per kept step.
     """
-    st.title("📈 Investment Growth Simulator")
-    
-    initial_amount = st.number_input("Initial Investment Amount ($):", min_value=100.0, value=1000.0, step=100.0)
-    annual_rate = st.slider("Annual Interest Rate (%):", min_value=1.0, max_value=20.0, value=5.0, step=0.1) / 100
-    years = st.selectbox("Investment Period (Years):", options=list(range(1, 31)), index=4)
+    rng = np.random.default_rng(seed)
+    dt = 1 / MONTE_CARLO_STEPS_PER_YEAR
+
+    log_growth = rng.standard_normal((paths, steps), dtype=np.float32)
+    log_growth *= np.float32(volatility * np.sqrt(dt))
+    log_growth += np.float32((rate - 0.5 * volatility ** 2) * dt)
+    np.cumsum(log_growth, axis=1, out=log_growth)
+
+    return principal * np.exp(log_growth[:, index - 1])
+
+@perf.timed("compute")
+@st.cache_data(show_spinner="Simulating return paths...", max_entries=32)
+def run_monte_carlo(principal, rate, volatility, years, paths, seed, _workers=1):
+    """
+    Simulates many return paths and summarizes them as percentile bands.
+
+    Paths are generated in chunks of `MONTE_CARLO_CHUNK_PATHS` so memory stays bounded, and
+    the chunks can be spread over a process pool. Results are memoized on the simulation
+    inputs; `_workers` only changes how the work is executed and is not part of the cache key.
+
+    Args:
+        principal (float): The initial amount of money invested.
+        rate (float): The expected annual return (as a decimal).
+        volatility (float): The annual volatility of returns (as a decimal).
+        years (int): The investment period in years.
+        paths (int): Number of paths to simulate.
+        seed (int): Seed of the random generator.
+        _workers (int, optional): Number of worker processes. Defaults to 1 (run in this process).
+
+    Returns:
+        tuple: A 2-D array with one row per entry of `PERCENTILES` and one column per kept
+               step (including the start), and a 1-D array with the time of each column in years.
+    """
+    steps = years * MONTE_CARLO_STEPS_PER_YEAR
+    index = np.unique(np.linspace(0, steps, min(steps, MONTE_CARLO_BAND_POINTS) + 1).round().astype(int))[1:]
+
+    sizes = [min(MONTE_CARLO_CHUNK_PATHS, paths - start) for start in range(0, paths, MONTE_CARLO_CHUNK_PATHS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    task = functools.partial(
+        simulate_paths, principal=principal, rate=rate, volatility=volatility, steps=steps, index=index
+    )
+
+    if _workers > 1 and len(sizes) > 1:
+        chunks = list(workers.get_process_pool().map(task, sizes, seeds))
+    else:
+        chunks = list(map(task, sizes, seeds))
+
+    bands = np.percentile(np.concatenate(chunks), PERCENTILES, axis=0)
+    bands = np.hstack([np.full((len(PERCENTILES), 1), principal), bands])
+    return bands, np.concatenate([[0], index]) / MONTE_CARLO_STEPS_PER_YEAR
+
+def show_deterministic(initial_amount, annual_rate, years):
+    """
+    Displays the deterministic growth curve for the chosen rate and any comparison rates.
+
+    Args:
+        initial_amount (float): The initial amount of money invested.
+        annual_rate (float): The annual interest rate (as a decimal).
+        years (int): The investment period in years.
+    """
+    compounding = st.selectbox("Compounding:", options=list(COMPOUNDING_FREQUENCIES), index=0)
+
+    columns = st.columns(2)
+    contribution = columns[0].number_input("Periodic Contribution ($):", min_value=0.0, value=0.0, step=50.0)
+    contribution_frequency = columns[1].selectbox("Contribution Frequency:", options=list(CONTRIBUTION_FREQUENCIES))
+
+    comparison_rates = st.multiselect("Compare with other rates (%):", options=list(range(1, 21)))
+
+    rates = [annual_rate] + [rate / 100 for rate in comparison_rates if rate / 100 != annual_rate]
+    periods_per_year = COMPOUNDING_FREQUENCIES[compounding]
+    values, times = simulate_growth(
+        initial_amount, rates, years, periods_per_year,
+        contribution, CONTRIBUTION_FREQUENCIES[contribution_frequency],
+    )
+    chart_values, chart_times = downsample(values, times, periods_per_year)
+
+    df = pd.DataFrame(chart_values.T, columns=[f"{rate * 100:g}%" for rate in rates])
+    df.insert(0, "Year", chart_times)
+    df = df.melt(id_vars="Year", var_name="Rate", value_name="Investment Value")
+
+    st.subheader(f"Investment Growth Over Time ({compounding})")
+    fig = px.line(df, x="Year", y="Investment Value", color="Rate", markers=False, title="Investment Growth Projection")
+    st.plotly_chart(fig)
+
+    st.subheader("Final Investment Value")
+    st.write(f"💰 After {years} years, your investment will be worth **${values[0, -1]:,.2f}**.")
+
+def show_monte_carlo(initial_amount, annual_rate, years):
+    """
+    Displays percentile bands of simulated return paths around the expected rate.
 
-    growth_data, days = calculate_compound_interest_daily(initial_amount, annual_rate, years)
+    Args:
+        initial_amount (float): The initial amount of money invested.
+        annual_rate (float): The expected annual return (as a decimal).
+        years (int): The investment period in years.
+    """
+    volatility = st.slider("Annual Volatility (%):", min_value=0.0, max_value=50.0, value=15.0, step=0.5) / 100
+    columns = st.columns(3)
+    paths = columns[0].selectbox("Simulated Paths:", options=[1_000, 10_000, 100_000], index=1)
+    seed = columns[1].number_input("Random Seed:", min_value=0, value=42, step=1)
+    parallel = columns[2].checkbox("Use all CPU cores", value=paths > MONTE_CARLO_CHUNK_PATHS)
 
-    df = pd.DataFrame({"Day": days, "Investment Value": growth_data})
+    worker_count = workers.max_workers() if parallel else 1
+    bands, times = run_monte_carlo(initial_amount, annual_rate, volatility, years, paths, int(seed), _workers=worker_count)
 
-    st.subheader("Investment Growth Over Time (Daily)")
-    fig = px.line(df, x="Day", y="Investment Value", markers=False, title="Daily Investment Growth Projection")
+    st.subheader("Investment Growth Percentiles")
+    fig = go.Figure()
+    for low, high in ((0, 4), (1, 3)):
+        fig.add_trace(go.Scatter(x=times, y=bands[high], mode="lines", line_width=0, showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(
+            x=times, y=bands[low], mode="lines", line_width=0, fill="tonexty",
+            fillcolor="rgba(99, 110, 250, 0.2)", name=f"P{PERCENTILES[low]}–P{PERCENTILES[high]}",
+        ))
+    fig.add_trace(go.Scatter(x=times, y=bands[2], mode="lines", name="Median"))
+    fig.update_layout(title=f"{paths:,} Simulated Paths", xaxis_title="Year", yaxis_title="Investment Value")
     st.plotly_chart(fig)
 
     st.subheader("Final Investment Value")
-    st.write(f"💰 After {years} years, your investment will be worth **${growth_data[-1]:,.2f}**.")
+    columns = st.columns(len(PERCENTILES))
+    for column, percentile, value in zip(columns, PERCENTILES, bands[:, -1]):
+        column.metric(f"P{percentile}", f"${value:,.2f}")
+
+def show():
+    """
+    Displays an investment growth simulator that calculates compound interest over time.
+
+    The user can input an initial investment amount, an annual interest rate and an investment period (in years).
+    In deterministic mode the user also picks the compounding frequency, an optional periodic contribution and
+    other rates to compare against, and the output displays the growth as month-end points and the final value.
+    In Monte Carlo mode the user sets a volatility and the number of simulated paths, and the output displays
+    percentile bands of the simulated growth and of the final value.
+    """
+    st.title("📈 Investment Growth Simulator")
+
+    initial_amount = st.number_input("Initial Investment Amount ($):", min_value=100.0, value=1000.0, step=100.0)
+    annual_rate = st.slider("Annual Interest Rate (%):", min_value=1.0, max_value=20.0, value=5.0, step=0.1) / 100
+    years = st.selectbox("Investment Period (Years):", options=list(range(1, 31)), index=4)
+    mode = st.radio("Mode:", ["Deterministic", "Monte Carlo"], horizontal=True)
+
+    if mode == "Deterministic":
+        show_deterministic(initial_amount, annual_rate, years)
+    else:
+        show_monte_carlo(initial_amount, annual_rate, years)
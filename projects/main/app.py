@@ -1,5 +1,8 @@
 import streamlit as st
 
+PROJECT_TITLE = "Home"
+PROJECT_ORDER = 0
+
 def show():
     """Displays the main window with initial portfolio information."""
     st.title("📂 My Project Portfolio")
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import namedtuple
+
+from utils import store
+
+Dataset = namedtuple("Dataset", ["frame", "facets", "ranges", "signature"])
+Dataset.__doc__ = """
+An immutable, parsed dataset shared by every session of the server process.
+
+Attributes:
+    frame (pd.DataFrame): The typed DataFrame. Callers must not modify it in place.
+    facets (dict): The sorted distinct values of each categorical column.
+    ranges (dict): The (min, max) of each numeric column.
+    signature (tuple): The (mtime_ns, size) of the file the dataset was read from.
+"""
+
+_cache = {}
+_cache_lock = threading.Lock()
+_path_locks = {}
+
+def file_signature(path):
+    """Returns the (mtime_ns, size) of a file, which changes whenever the file is rewritten."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def build_dataset(frame, categorical=(), signature=None):
+    """
+    Types a DataFrame and precomputes the facet values and ranges used by filter widgets.
+
+    Args:
+        frame (pd.DataFrame): The parsed data.
+        categorical (iterable, optional): Columns to store as pandas categoricals. Columns
+            missing from the frame are ignored.
+        signature (tuple, optional): The signature of the source file.
+
+    Returns:
+        Dataset: The typed frame with its facets and ranges.
+    """
+    categorical = [column for column in categorical if column in frame.columns]
+    for column in categorical:
+        if frame[column].dtype != "category":
+            frame[column] = frame[column].astype("category")
+
+    facets = {column: frame[column].cat.categories.tolist() for column in categorical}
+    numeric = frame.select_dtypes(include=["number"])
+    ranges = dict(zip(numeric.columns, zip(numeric.min().tolist(), numeric.max().tolist())))
+    return Dataset(frame, facets, ranges, signature)
+
+def load_dataset(path, categorical=(), columns=None):
+    """
+    Loads a CSV file through the process-wide dataset cache.
+
+    Entries are keyed on the absolute path and reused as long as the file's modification
+    time and size are unchanged. When the file changes, the next call loads it again and
+    replaces the stale entry. Concurrent loads of the same file wait for a single load.
+    Loads go through the columnar store, so only the first load of a file version parses CSV.
+
+    Args:
+        path (str): Path to the CSV file.
+        categorical (iterable, optional): Columns to parse as pandas categoricals.
+        columns (list, optional): Columns to load; names missing from the file are skipped.
+
+    Returns:
+        Dataset: The cached dataset.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    path = os.path.abspath(path)
+    categorical = tuple(categorical)
+    columns = tuple(columns) if columns is not None else None
+
+    with _cache_lock:
+        path_lock = _path_locks.setdefault(path, threading.Lock())
+
+    with path_lock:
+        signature = file_signature(path)
+        key = (path, categorical, columns)
+        with _cache_lock:
+            dataset = _cache.get(key)
+        if dataset is not None and dataset.signature == signature:
+            return dataset
+
+        frame = store.read_csv(path, list(columns) if columns is not None else None, categorical)
+        dataset = build_dataset(frame, categorical, signature)
+        with _cache_lock:
+            _cache[key] = dataset
+        return dataset
+
+def clear():
+    """Drops every cached dataset."""
+    with _cache_lock:
+        _cache.clear()
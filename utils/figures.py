@@ -0,0 +1,185 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DEFAULT_DPI = 100
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+_live_figures = 0
+_pending = {}
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="figures")
+
+def cache_max_bytes():
+    """Returns the image cache budget, read from `FIGURE_CACHE_MAX_MB` (default 64)."""
+    try:
+        return int(os.getenv("FIGURE_CACHE_MAX_MB", "64")) * 1024 * 1024
+    except ValueError:
+        return 64 * 1024 * 1024
+
+def native_charts():
+    """Returns True unless `CHART_BACKEND=matplotlib` asks for rendered images instead of native charts."""
+    return os.getenv("CHART_BACKEND", "native").strip().lower() != "matplotlib"
+
+def data_key(*parts):
+    """
+    Hashes the data a figure is drawn from.
+
+    Arrays and Series are hashed by their bytes; other values by their `repr`, so dicts
+    and lists must be built in a deterministic order.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        values = getattr(part, "values", part) if not isinstance(part, dict) else part
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            digest.update(str((values.dtype, values.shape)).encode())
+            digest.update(np.ascontiguousarray(values).tobytes())
+        else:
+            digest.update(repr(values).encode())
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def cached(key, render, metrics=None):
+    """
+    Returns the bytes cached under a key, calling `render()` to produce them on a miss.
+
+    The cache is shared by every session of the process and evicts the least recently
+    used images once it exceeds `FIGURE_CACHE_MAX_MB`.
+
+    Args:
+        key (tuple): Identifies the image, including its data hash, size and format.
+        render (callable): Returns the encoded image bytes.
+        metrics (dict, optional): A per-session dict whose counters are updated, e.g. from
+            `st.session_state`.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    global _cache_bytes
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+    if data is not None:
+        record(metrics, "cache_hits")
+        return data
+
+    start = time.perf_counter()
+    data = render()
+    record(metrics, "rendered", time.perf_counter() - start)
+
+    with _lock:
+        if key not in _cache:
+            _cache[key] = data
+            _cache_bytes += len(data)
+        max_bytes = cache_max_bytes()
+        while _cache_bytes > max_bytes and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+    return data
+
+def get(key, metrics=None):
+    """Returns the bytes cached under a key without rendering them, or None."""
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+    if data is not None:
+        record(metrics, "cache_hits")
+    return data
+
+def submit(key, render, metrics=None):
+    """
+    Renders an image into the cache on a background thread.
+
+    Sessions asking for an image that is already being rendered share the same future,
+    so a slow render runs once however many reruns request it.
+
+    Args:
+        key (tuple): Identifies the image, as for `cached`.
+        render (callable): Returns the encoded image bytes.
+        metrics (dict, optional): The per-session metrics passed to `cached`.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the encoded image.
+    """
+    with _lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _pending[key] = _executor.submit(cached, key, render, metrics)
+            future.add_done_callback(lambda _: _forget(key))
+        return future
+
+def _forget(key):
+    with _lock:
+        _pending.pop(key, None)
+
+def render_matplotlib(draw, key, width, height, fmt="png", dpi=DEFAULT_DPI, metrics=None):
+    """
+    Renders a matplotlib drawing to PNG or SVG bytes through the image cache.
+
+    The figure is created with `matplotlib.figure.Figure` rather than `pyplot`, so it is
+    never registered with pyplot's global figure manager, and it is cleared as soon as it
+    has been encoded. Nothing is left open between reruns.
+
+    Args:
+        draw (callable): Called as `draw(fig, ax)` to draw on a fresh figure with one axes.
+        key (str): A hash of the plotted data, e.g. from `data_key`.
+        width (int): Width in pixels.
+        height (int): Height in pixels.
+        fmt (str, optional): 'png' or 'svg'. Defaults to 'png'.
+        dpi (int, optional): Resolution. Defaults to 100.
+        metrics (dict, optional): The per-session metrics passed to `cached`.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    def render():
+        global _live_figures
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        with _lock:
+            _live_figures += 1
+        try:
+            draw(fig, fig.subplots())
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, bbox_inches="tight")
+            return buffer.getvalue()
+        finally:
+            fig.clear()
+            with _lock:
+                _live_figures -= 1
+
+    return cached(("matplotlib", key, width, height, fmt, dpi), render, metrics)
+
+def record(metrics, event, seconds=None):
+    """
+    Counts a chart event in a per-session metrics dict.
+
+    Args:
+        metrics (dict): The session's metrics, or None to skip recording.
+        event (str): 'rendered', 'cache_hits' or 'native'.
+        seconds (float, optional): The render time of a 'rendered' event.
+    """
+    if metrics is None:
+        return
+    metrics[event] = metrics.get(event, 0) + 1
+    if seconds is not None:
+        metrics["render_ms"] = metrics.get("render_ms", 0.0) + seconds * 1000
+        metrics["last_render_ms"] = seconds * 1000
+
+def cache_metrics():
+    """Returns the number and total size of cached images, and the number of figures and images being rendered."""
+    with _lock:
+        return {"images": len(_cache), "bytes": _cache_bytes, "live_figures": _live_figures, "pending": len(_pending)}
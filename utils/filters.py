@@ -0,0 +1,178 @@
+import numpy as np
+
+class FilterIndex:
+    """
+    Precomputed indexes that answer `isin` and `between` predicates without scanning the frame.
+
+    Categorical columns are grouped into per-value row postings (one stable argsort of the
+    category codes), from which packed bitmaps are built on first use and memoized. Numeric
+    columns are kept as sorted arrays with their row order, so a range resolves to a slice
+    found by binary search. Every predicate returns a packed bitmap (`np.packbits`), so
+    combining predicates is a byte-wise AND over `rows / 8` bytes.
+
+    The index is read-only after construction apart from the bitmap memo, and is meant to
+    be shared by every session that looks at the same version of a dataset.
+    """
+
+    def __init__(self, frame, categorical=(), numeric=()):
+        """
+        Builds the index.
+
+        Args:
+            frame (pd.DataFrame): The data to index. Categorical columns must use the `category` dtype.
+            categorical (iterable, optional): Columns that will be filtered with `isin`.
+            numeric (iterable, optional): Columns that will be filtered with `between`.
+        """
+        self.rows = len(frame)
+        self._postings = {}
+        self._present = {}
+        self._sorted = {}
+        self._bitmaps = {}
+
+        for column in categorical:
+            codes = frame[column].cat.codes.to_numpy()
+            categories = frame[column].cat.categories.tolist()
+            order = np.argsort(codes, kind="stable")
+            missing = int(np.count_nonzero(codes < 0))
+            counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+            starts = missing + np.concatenate([[0], np.cumsum(counts)])
+            self._postings[column] = (order, starts, {value: code for code, value in enumerate(categories)})
+            if missing:
+                self._present[column] = self._pack(order[missing:])
+
+        for column in numeric:
+            values = frame[column].to_numpy()
+            order = np.argsort(values, kind="stable")
+            self._sorted[column] = (order, values[order])
+
+    def _pack(self, rows, complement=False):
+        """Returns the packed bitmap with the given rows set (or cleared, when `complement` is True)."""
+        mask = np.ones(self.rows, dtype=bool) if complement else np.zeros(self.rows, dtype=bool)
+        mask[rows] = not complement
+        return np.packbits(mask)
+
+    def bitmap(self, column, value):
+        """Returns the memoized packed bitmap of the rows where `column == value`."""
+        key = (column, value)
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            order, starts, codes = self._postings[column]
+            code = codes[value]
+            bitmap = self._bitmaps[key] = self._pack(order[starts[code]:starts[code + 1]])
+        return bitmap
+
+    def isin(self, column, values):
+        """
+        Resolves `column.isin(values)` as a packed bitmap.
+
+        The bitmaps of the selected values are OR-ed together, or, when most values are
+        selected, the bitmaps of the unselected ones are OR-ed and inverted, so the cost
+        depends on the smaller side of the selection.
+        """
+        codes = self._postings[column][2]
+        selected = codes.keys() & set(values)
+        unselected = codes.keys() - selected
+
+        result = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        for value in (selected if len(selected) <= len(unselected) else unselected):
+            np.bitwise_or(result, self.bitmap(column, value), out=result)
+
+        if len(selected) > len(unselected):
+            np.invert(result, out=result)
+            if column in self._present:
+                np.bitwise_and(result, self._present[column], out=result)
+        return result
+
+    def between(self, column, low, high):
+        """
+        Resolves `column.between(low, high)` as a packed bitmap.
+
+        The matching rows form one contiguous slice of the sorted values, located with two
+        binary searches. Missing values sort last and never match.
+        """
+        order, sorted_values = self._sorted[column]
+        start = np.searchsorted(sorted_values, low, side="left")
+        stop = np.searchsorted(sorted_values, high, side="right")
+        if stop - start <= self.rows // 2:
+            return self._pack(order[start:stop])
+        return self._pack(np.concatenate([order[:start], order[stop:]]), complement=True)
+
+    def order(self, column):
+        """Returns the row numbers of an indexed column in ascending order of its values."""
+        if column in self._sorted:
+            return self._sorted[column][0]
+        return self._postings[column][0]
+
+    def evaluate(self, predicate):
+        """
+        Resolves a predicate tuple as a packed bitmap.
+
+        Args:
+            predicate (tuple): Either `("isin", column, values)` or `("between", column, (low, high))`.
+        """
+        kind, column, argument = predicate
+        if kind == "isin":
+            return self.isin(column, argument)
+        if kind == "between":
+            return self.between(column, *argument)
+        raise ValueError(f"Unknown predicate: {kind}")
+
+def apply_filters(index, predicates, cache):
+    """
+    Combines named predicates into a boolean row mask, recomputing only the ones that changed.
+
+    The bitmap of each predicate is kept in `cache` (typically a dict in the session state)
+    together with the predicate that produced it. On the next call, predicates whose
+    arguments are unchanged reuse their bitmap, so moving one widget costs one index lookup
+    plus a byte-wise AND of the cached bitmaps. The cache is reset when the index changes.
+
+    Args:
+        index (FilterIndex): The index of the data being filtered.
+        predicates (dict): Predicate tuples (see `FilterIndex.evaluate`) keyed by widget name.
+            `isin` values must be hashable collections such as frozensets.
+        cache (dict): Mutable storage for the per-widget bitmaps.
+
+    Returns:
+        np.ndarray: A boolean mask with one entry per indexed row.
+    """
+    if cache.get("index") is not index:
+        cache.clear()
+        cache["index"] = index
+        cache["masks"] = {}
+
+    masks = cache["masks"]
+    combined = np.full((index.rows + 7) // 8, 0xFF, dtype=np.uint8)
+    for name, predicate in predicates.items():
+        cached = masks.get(name)
+        if cached is None or cached[0] != predicate:
+            cached = masks[name] = (predicate, index.evaluate(predicate))
+        np.bitwise_and(combined, cached[1], out=combined)
+
+    return np.unpackbits(combined, count=index.rows).astype(bool)
+
+def page_rows(index, mask, page, page_size, sort_column=None, descending=False):
+    """
+    Returns the row numbers of one page of the rows selected by a mask.
+
+    Sorting by an indexed column reuses the row order stored in the index, so a sorted page
+    costs one pass over the mask instead of a sort of the matching rows.
+
+    Args:
+        index (FilterIndex): The index of the data.
+        mask (np.ndarray): A boolean mask with one entry per row.
+        page (int): The zero-based page number.
+        page_size (int): Rows per page.
+        sort_column (str, optional): An indexed column to sort by. Defaults to the original row order.
+        descending (bool, optional): Whether to sort in descending order. Defaults to False.
+
+    Returns:
+        np.ndarray: The row numbers of the page, suitable for `DataFrame.iloc`.
+    """
+    if sort_column is None:
+        rows = np.flatnonzero(mask)
+    else:
+        order = index.order(sort_column)
+        rows = order[mask[order]]
+    if descending:
+        rows = rows[::-1]
+    return rows[page * page_size:(page + 1) * page_size]
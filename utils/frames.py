@@ -0,0 +1,126 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+class FrameHandle:
+    """
+    A session's reference to a frame held by a `FrameRegistry`.
+
+    Sessions store the handle instead of the frame, so every session viewing the same
+    upload shares one copy. The reference is released when the handle is garbage
+    collected, e.g. when the session ends or replaces it with another upload.
+    """
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+        self._finalizer = None
+        if registry.acquire(key):
+            self._finalizer = weakref.finalize(self, registry.release, key)
+
+    def frame(self):
+        """Returns the shared frame, or None if it is no longer held by the registry."""
+        return self.registry.get(self.key)
+
+    def release(self):
+        """Releases the reference now instead of waiting for garbage collection."""
+        if self._finalizer is not None:
+            self._finalizer()
+
+class FrameRegistry:
+    """
+    A process-wide, reference-counted cache of immutable DataFrames keyed by content hash.
+
+    Frames are evicted least recently used first once their total size exceeds `max_bytes`,
+    but a frame is never evicted while a `FrameHandle` references it. Hits, misses and
+    evictions are counted for monitoring. Frames are shared between sessions and must not
+    be modified in place.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        Args:
+            max_bytes (int): The total size of frames to keep. Referenced frames are kept even
+                when they alone exceed it.
+        """
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Returns the frame stored under a key, or None, and marks it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry["frame"]
+
+    def put(self, key, frame):
+        """
+        Stores a frame under a key, evicting unreferenced frames if the budget is exceeded.
+
+        Args:
+            key (str): The content hash of the frame.
+            frame (pd.DataFrame): The frame to share.
+
+        Returns:
+            pd.DataFrame: The frame now stored under the key, which is the existing one if
+                          another session stored the same key first.
+        """
+        size = int(frame.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {"frame": frame, "bytes": size, "refs": 0}
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+            return entry["frame"]
+
+    def handle(self, key):
+        """Returns a new `FrameHandle` holding a reference to the frame stored under a key."""
+        return FrameHandle(self, key)
+
+    def acquire(self, key):
+        """Adds a reference to the frame stored under a key and returns False if there is no such frame."""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries[key]["refs"] += 1
+            return True
+
+    def release(self, key):
+        """Removes a reference to the frame stored under a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["refs"] > 0:
+                entry["refs"] -= 1
+                self._evict()
+
+    def _evict(self, keep=None):
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry["refs"] == 0 and key != keep:
+                del self._entries[key]
+                total -= entry["bytes"]
+                self.evictions += 1
+
+    def metrics(self):
+        """Returns the number of frames, their total size, references, hits, misses and evictions."""
+        with self._lock:
+            return {
+                "frames": len(self._entries),
+                "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+                "references": sum(entry["refs"] for entry in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import union_categoricals
+from utils import store
+from utils.frames import FrameRegistry
+
+CHUNK_ROWS = 100_000
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+CATEGORY_MAX_RATIO = 0.5
+UPLOAD_HASHES_MAX_ENTRIES = 1024
+
+FRAMES = FrameRegistry(max_bytes=int(os.getenv("SHARED_FRAMES_MAX_MB", "1024")) * 1024 * 1024)
+
+def content_hash(file):
+    """
+    Hashes the content of a file-like object in fixed-size blocks.
+
+    Args:
+        file: A binary file-like object, such as a Streamlit `UploadedFile`. It is rewound afterwards.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+_upload_hashes = OrderedDict()
+_upload_hashes_lock = threading.Lock()
+
+def upload_hash(file):
+    """
+    Returns the content hash of an upload, computed once per upload.
+
+    Streamlit gives every upload a unique `file_id`, so the hash is memoized per file id and
+    size and reruns that hand back the same upload do not read it again. Other file-like
+    objects are hashed on every call.
+
+    Args:
+        file: A binary file-like object, such as a Streamlit `UploadedFile`.
+
+    Returns:
+        str: The hex digest of the content, as returned by `content_hash`.
+    """
+    file_id = getattr(file, "file_id", None)
+    if file_id is None:
+        return content_hash(file)
+
+    key = (file_id, getattr(file, "size", None))
+    with _upload_hashes_lock:
+        digest = _upload_hashes.get(key)
+        if digest is not None:
+            _upload_hashes.move_to_end(key)
+            return digest
+    digest = content_hash(file)
+    with _upload_hashes_lock:
+        _upload_hashes[key] = digest
+        while len(_upload_hashes) > UPLOAD_HASHES_MAX_ENTRIES:
+            _upload_hashes.popitem(last=False)
+    return digest
+
+def compact_chunk(chunk):
+    """
+    Downcasts the numeric columns of a chunk and stores its string columns as categoricals.
+
+    Float columns are stored as float32 only when every value survives the round trip, so
+    sums and means computed from the frame do not change.
+
+    Args:
+        chunk (pd.DataFrame): A freshly parsed chunk. It is modified in place.
+
+    Returns:
+        pd.DataFrame: The same chunk with compact dtypes.
+    """
+    for column in chunk.columns:
+        series = chunk[column]
+        if pd.api.types.is_integer_dtype(series):
+            chunk[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            downcast = series.astype("float32")
+            if downcast.astype(series.dtype).equals(series):
+                chunk[column] = downcast
+        elif pd.api.types.is_string_dtype(series) or pd.api.types.is_object_dtype(series):
+            chunk[column] = series.astype("category")
+    return chunk
+
+def combine_chunks(chunks):
+    """
+    Concatenates compacted chunks, merging the categories of each string column.
+
+    Columns whose merged categories exceed `CATEGORY_MAX_RATIO` of the rows are high-cardinality
+    text and are stored as plain objects instead.
+
+    Args:
+        chunks (list): The compacted chunks, in file order.
+
+    Returns:
+        pd.DataFrame: The complete frame with a fresh `RangeIndex`.
+    """
+    if len(chunks) == 1:
+        frame = chunks[0]
+    else:
+        categorical = [column for column in chunks[0].columns if chunks[0][column].dtype == "category"]
+        merged = {
+            column: union_categoricals([chunk[column] for chunk in chunks], ignore_order=True)
+            for column in categorical
+            if all(chunk[column].dtype == "category" for chunk in chunks)
+        }
+        frame = pd.concat([chunk.drop(columns=list(merged)) for chunk in chunks], ignore_index=True)
+        for column, values in merged.items():
+            frame[column] = values
+        frame = frame[chunks[0].columns]
+
+    for column in frame.columns:
+        if frame[column].dtype == "category" and len(frame[column].cat.categories) > CATEGORY_MAX_RATIO * len(frame):
+            frame[column] = frame[column].astype(object)
+    return frame.reset_index(drop=True)
+
+def read_csv_streaming(file, on_chunk=None, chunk_rows=CHUNK_ROWS):
+    """
+    Parses a CSV file in chunks, compacting each chunk as soon as it is read.
+
+    Args:
+        file: A binary file-like object positioned at the start of the CSV.
+        on_chunk (callable, optional): Called after each chunk as `on_chunk(chunk, rows_read, fraction)`,
+            where `fraction` is the share of the file consumed so far (when the size is known).
+        chunk_rows (int, optional): Rows per chunk. Defaults to 100,000.
+
+    Returns:
+        pd.DataFrame: The complete frame with compact dtypes.
+    """
+    size = getattr(file, "size", None)
+    chunks = []
+    rows_read = 0
+    with pd.read_csv(file, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            chunk = compact_chunk(chunk)
+            chunks.append(chunk)
+            rows_read += len(chunk)
+            if on_chunk is not None:
+                fraction = min(file.tell() / size, 1.0) if size else None
+                on_chunk(chunk, rows_read, fraction)
+
+    if not chunks:
+        return pd.DataFrame()
+    return combine_chunks(chunks)
+
+def get_frame(key):
+    """
+    Returns the frame of an upload by content hash, from memory or from the columnar store.
+
+    Args:
+        key (str): The content hash returned by `load_csv`.
+
+    Returns:
+        pd.DataFrame: The shared frame, or None if it is neither in memory nor in the store.
+    """
+    frame = FRAMES.get(key)
+    if frame is not None:
+        return frame
+    try:
+        return FRAMES.put(key, store.read_frame(f"upload-{key}"))
+    except FileNotFoundError:
+        return None
+
+def load_csv(file, on_chunk=None):
+    """
+    Loads an uploaded CSV through the shared frame registry, keyed on the file's content hash.
+
+    The hash is memoized per upload (`upload_hash`), so a rerun that finds the frame cached
+    does not read the file at all.
+
+    Re-uploads of the same bytes, from any session, and reruns that hand back the same
+    upload, return the shared frame without parsing. The registry `FRAMES` evicts
+    unreferenced frames past `SHARED_FRAMES_MAX_MB`. Shared frames must not be modified
+    in place. Frames that have left the registry, or were parsed by another server
+    process, are read back from the columnar store instead of being parsed again.
+
+    Args:
+        file: A binary file-like object, such as a Streamlit `UploadedFile`.
+        on_chunk (callable, optional): Progress callback passed to `read_csv_streaming`.
+            It is not called when the frame comes from the cache.
+
+    Returns:
+        tuple: The content hash and the parsed frame.
+    """
+    key = upload_hash(file)
+    frame = get_frame(key)
+    if frame is not None:
+        return key, frame
+
+    frame = read_csv_streaming(file, on_chunk)
+    try:
+        store.write_frame(f"upload-{key}", frame)
+    except (OSError, pa.ArrowException):
+        pass
+    return key, FRAMES.put(key, frame)
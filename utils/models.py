@@ -0,0 +1,217 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from utils import datasets, store
+
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join("data", "models"))
+MODEL_KEEP_VERSIONS = 3
+LATENCY_WINDOW = 1000
+
+def artifact_key(data_path, features, target):
+    """
+    Returns the version of a model: a hash of its training data content, feature set and target.
+
+    Args:
+        data_path (str): Path to the training CSV file.
+        features (list): The feature columns, in the order the model expects them.
+        target (str): The target column.
+
+    Returns:
+        str: The hex digest identifying the artifact.
+    """
+    signature = f"{store.file_key(data_path)}:{','.join(features)}:{target}"
+    return hashlib.blake2b(signature.encode(), digest_size=20).hexdigest()
+
+def artifact_path(name, version):
+    """Returns the path of the pickled artifact of a model version."""
+    return os.path.join(MODEL_DIR, name, f"{version}.pkl")
+
+def save_artifact(name, version, model):
+    """
+    Pickles a model to its versioned path, keeping only the newest `MODEL_KEEP_VERSIONS` artifacts.
+
+    The artifact is written to a temporary name and renamed into place, so other processes
+    never load a partial file.
+    """
+    directory = os.path.join(MODEL_DIR, name)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, artifact_path(name, version))
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    artifacts = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".pkl")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in artifacts[MODEL_KEEP_VERSIONS:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+class ModelRegistry:
+    """
+    A process-wide cache of trained models, versioned on their training data and features.
+
+    Each model name maps to the estimator currently serving it. When the training file
+    changes, a new version is trained on a background thread while the previous version
+    keeps serving, and it replaces the old one once it is ready. A version whose training
+    failed is not retried until the data or features change its version. Artifacts are stored on
+    disk, so a restarted process loads the current version instead of training it again.
+    Load, training and inference latencies are recorded for monitoring.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._training = {}
+        self._errors = {}
+        self._wanted = {}
+        self._lock = threading.Lock()
+        self._latencies = {}
+
+    def get(self, name, data_path, features, target, fit):
+        """
+        Returns the model serving a name, training or loading its current version if needed.
+
+        Only the first request for a model, with no earlier version to fall back on, waits for
+        training. Later data changes are trained in the background.
+
+        Args:
+            name (str): The model name, used for the artifact folder.
+            data_path (str): Path to the training CSV file.
+            features (list): The feature columns.
+            target (str): The target column.
+            fit (callable): Called as `fit(X, y)` with the feature frame and target series,
+                and returns the fitted estimator.
+
+        Returns:
+            tuple: The estimator and its entry, a dict with the `version` it was trained for,
+                   whether a newer version is `training`, and the `error` of the current version's
+                   training if it failed, in which case the previous version keeps serving.
+        """
+        features = list(features)
+        version = artifact_key(data_path, features, target)
+        with self._lock:
+            self._wanted[name] = version
+            entry = self._models.get(name)
+            if entry is not None and entry["version"] == version:
+                return entry["model"], self._describe(name, entry)
+
+        path = artifact_path(name, version)
+        if os.path.exists(path):
+            start = time.perf_counter()
+            with open(path, "rb") as f:
+                model = pickle.load(f)
+            entry = self._install(name, version, model, load_seconds=time.perf_counter() - start)
+            return model, self._describe(name, entry)
+
+        if entry is None:
+            entry = self._train(name, version, data_path, features, target, fit)
+            return entry["model"], self._describe(name, entry)
+
+        with self._lock:
+            failed = self._errors.get(name)
+            if self._training.get(name) != version and (failed is None or failed[0] != version):
+                self._training[name] = version
+                threading.Thread(
+                    target=self._train_in_background,
+                    args=(name, version, data_path, features, target, fit),
+                    name=f"train-{name}",
+                    daemon=True,
+                ).start()
+            return entry["model"], self._describe(name, entry)
+
+    def predict(self, name, model, X):
+        """Calls `model.predict(X)` and records its latency under the model name."""
+        start = time.perf_counter()
+        prediction = model.predict(X)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._latencies.setdefault(name, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+        return prediction
+
+    def metrics(self, name):
+        """
+        Returns the monitoring metrics of a model.
+
+        Returns:
+            dict: The serving version, whether a new version is training or failed, the load and
+                  training times in milliseconds, and the count, mean and 95th percentile of the
+                  recent inference latencies.
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            latencies = np.array(self._latencies.get(name, ()), dtype=float) * 1000
+            metrics = {
+                "version": entry["version"][:12] if entry else None,
+                "training": self._training[name][:12] if name in self._training else None,
+                "last_error": f"{self._errors[name][0][:12]}: {self._errors[name][1]}" if name in self._errors else None,
+                "load_ms": round(entry["load_seconds"] * 1000, 3) if entry and entry["load_seconds"] is not None else None,
+                "train_ms": round(entry["train_seconds"] * 1000, 3) if entry and entry["train_seconds"] is not None else None,
+                "predictions": len(latencies),
+            }
+        if len(latencies):
+            metrics["inference_mean_ms"] = round(float(latencies.mean()), 3)
+            metrics["inference_p95_ms"] = round(float(np.percentile(latencies, 95)), 3)
+        return metrics
+
+    def _train(self, name, version, data_path, features, target, fit):
+        frame = datasets.load_dataset(data_path, columns=features + [target]).frame
+        start = time.perf_counter()
+        model = fit(frame[features], frame[target])
+        train_seconds = time.perf_counter() - start
+        try:
+            save_artifact(name, version, model)
+        except OSError:
+            pass
+        return self._install(name, version, model, train_seconds=train_seconds)
+
+    def _train_in_background(self, name, version, data_path, features, target, fit):
+        try:
+            self._train(name, version, data_path, features, target, fit)
+        except Exception as e:
+            with self._lock:
+                self._errors[name] = (version, str(e))
+        finally:
+            with self._lock:
+                if self._training.get(name) == version:
+                    del self._training[name]
+
+    def _install(self, name, version, model, load_seconds=None, train_seconds=None):
+        entry = {
+            "version": version,
+            "model": model,
+            "load_seconds": load_seconds,
+            "train_seconds": train_seconds,
+            "installed_at": time.time(),
+        }
+        with self._lock:
+            current = self._models.get(name)
+            wanted = self._wanted.get(name)
+            superseded = current is not None and current["version"] == wanted != version
+            if not superseded and (current is None or current["version"] != version):
+                self._models[name] = entry
+                self._errors.pop(name, None)
+            return self._models[name]
+
+    def _describe(self, name, entry):
+        failed = self._errors.get(name)
+        return {
+            "version": entry["version"],
+            "training": self._training.get(name) is not None,
+            "error": failed[1] if failed is not None and failed[0] == self._wanted.get(name) else None,
+        }
+
+MODELS = ModelRegistry()
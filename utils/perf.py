@@ -0,0 +1,196 @@
+import argparse
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+WINDOW = 1000
+PROFILE_LINES = 40
+STAGE_ORDER = ("total", "import", "load", "compute", "network", "chart", "render")
+
+_current = contextvars.ContextVar("perf_run", default=None)
+_lock = threading.Lock()
+_timings = defaultdict(lambda: deque(maxlen=WINDOW))
+_log_lock = threading.Lock()
+
+def log_path():
+    """Returns the JSON lines file every timed rerun is appended to, read from `PERF_LOG` (empty disables it)."""
+    return os.getenv("PERF_LOG", "").strip()
+
+class _Run:
+    def __init__(self, page):
+        self.page = page
+        self.stages = defaultdict(float)
+        self.children = [0.0]
+
+@contextmanager
+def page(name):
+    """
+    Times one rerun of a page and the stages it goes through.
+
+    Stages entered inside the block (`stage`, `timed`) are attributed to this page. Their
+    time is exclusive: a stage nested in another is subtracted from its parent, so the
+    stages add up to at most the total. Whatever is left, mostly building widgets and
+    serializing elements for the browser, is recorded as the "render" stage.
+    Reruns interrupted by an exception, including `st.rerun` and `st.stop`, are not recorded.
+
+    Args:
+        name (str): The page title.
+    """
+    run = _Run(name)
+    token = _current.set(run)
+    start = time.perf_counter()
+    completed = False
+    try:
+        yield run
+        completed = True
+    finally:
+        _current.reset(token)
+        if completed:
+            _record(run, time.perf_counter() - start)
+
+@contextmanager
+def stage(name):
+    """Times a block as a stage of the page being rendered; does nothing outside `page`, e.g. on warm-up threads."""
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    run.children.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        run.stages[name] += elapsed - run.children.pop()
+        run.children[-1] += elapsed
+
+def timed(name):
+    """
+    Decorates a function so each call is timed as a stage, e.g. `@perf.timed("load")`.
+
+    Put it above `st.cache_data`/`st.cache_resource` so cache hits are measured too.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _record(run, total):
+    samples = {"total": total, **run.stages, "render": max(0.0, total - run.children[0])}
+    with _lock:
+        for name, seconds in samples.items():
+            _timings[(run.page, name)].append(seconds)
+
+    path = log_path()
+    if path:
+        entry = {"time": round(time.time(), 3), "page": run.page,
+                 "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in samples.items()}}
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+def summarize(samples):
+    """
+    Computes the latency percentiles of timing samples.
+
+    Args:
+        samples (dict): Durations in seconds, keyed by (page, stage).
+
+    Returns:
+        list: One dictionary per page and stage with the number of runs and the p50, p95,
+              p99 and last durations in milliseconds, ordered by page and `STAGE_ORDER`.
+    """
+    rank = {name: position for position, name in enumerate(STAGE_ORDER)}
+    rows = []
+    for (page_name, stage_name), values in sorted(samples.items(), key=lambda item: (item[0][0], rank.get(item[0][1], len(rank)), item[0][1])):
+        if not len(values):
+            continue
+        p50, p95, p99 = np.percentile(np.asarray(values) * 1000, [50, 95, 99])
+        rows.append({
+            "page": page_name, "stage": stage_name, "runs": len(values),
+            "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3),
+            "last_ms": round(values[-1] * 1000, 3),
+        })
+    return rows
+
+def summary():
+    """Returns `summarize` of the last `WINDOW` reruns of each page in this server process."""
+    with _lock:
+        samples = {key: list(values) for key, values in _timings.items()}
+    return summarize(samples)
+
+def reset():
+    """Forgets every recorded timing."""
+    with _lock:
+        _timings.clear()
+
+def profile(func, lines=PROFILE_LINES):
+    """
+    Calls a function under cProfile.
+
+    Args:
+        func (callable): The function to profile, called without arguments.
+        lines (int, optional): How many functions to list. Defaults to 40.
+
+    Returns:
+        tuple: The function result and the profile report, sorted by cumulative time.
+               The report is also produced when the function raises, and attached to the
+               exception as its `profile_report` attribute.
+    """
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func)
+    except BaseException as e:
+        e.profile_report = _report(profiler, lines)
+        raise
+    return result, _report(profiler, lines)
+
+def _report(profiler, lines):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats("cumulative").print_stats(lines)
+    return out.getvalue()
+
+def read_log(path):
+    """Reads a `PERF_LOG` file into samples for `summarize`, keeping the last `WINDOW` of each page and stage."""
+    samples = defaultdict(lambda: deque(maxlen=WINDOW))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            for name, ms in entry.get("stages_ms", {}).items():
+                samples[(entry["page"], name)].append(ms / 1000)
+    return {key: list(values) for key, values in samples.items()}
+
+def main(argv=None):
+    """
+    Prints the latency percentiles of a `PERF_LOG` file as JSON.
+
+    Run from the repository root with `python -m utils.perf data/perf.jsonl`, so the numbers
+    can be collected by scripts and monitoring without opening the app.
+    """
+    parser = argparse.ArgumentParser(description="Summarize the page timings logged by the app.")
+    parser.add_argument("log", nargs="?", default=log_path(), help="The PERF_LOG file.")
+    args = parser.parse_args(argv)
+    if not args.log:
+        parser.error("no log file given and PERF_LOG is not set")
+
+    print(json.dumps(summarize(read_log(args.log)), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
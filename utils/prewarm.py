@@ -0,0 +1,77 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import registry
+
+_lock = threading.Lock()
+_status = {}
+
+def is_enabled():
+    """Returns True when pre-warming is switched on with the `PREWARM` environment variable."""
+    return os.getenv("PREWARM", "0").strip().lower() in ("1", "true", "yes", "on")
+
+def max_workers():
+    """Returns how many projects may warm at once, read from `PREWARM_WORKERS` (default 1)."""
+    try:
+        return max(1, int(os.getenv("PREWARM_WORKERS", "1")))
+    except ValueError:
+        return 1
+
+def warm_project(title, project):
+    """
+    Imports a project, its declared heavy dependencies, and calls its optional `warm` hook.
+
+    Project modules define `warm()` to load their datasets into the cache used by `show()`.
+    Failures are recorded in the status instead of being raised, since nobody waits on them.
+
+    Args:
+        title (str): The project title, used as the status key.
+        project (dict): The project entry returned by `registry.discover_projects`.
+    """
+    with _lock:
+        _status[title] = "warming"
+    try:
+        module = registry.import_project(project["module"])
+        registry.import_heavy_dependencies(project)
+        warm = getattr(module, "warm", None)
+        if warm is not None:
+            warm()
+    except Exception as e:
+        with _lock:
+            _status[title] = f"failed: {e}"
+    else:
+        with _lock:
+            _status[title] = "ready"
+
+def start(projects, skip=()):
+    """
+    Warms the registered projects on a background thread pool, once per server process.
+
+    The pool has `max_workers()` threads so that small containers only hold a few
+    partially imported modules in memory at a time. Calls after the first one return
+    immediately, so this can be invoked on every rerun of the Home page.
+
+    Args:
+        projects (dict): The registry returned by `registry.discover_projects`.
+        skip (iterable, optional): Titles of projects that should not be warmed.
+
+    Returns:
+        bool: True if this call started the warm-up, False if it was already started.
+    """
+    with _lock:
+        if _status:
+            return False
+        pending = {title: project for title, project in projects.items() if title not in skip}
+        _status.update(dict.fromkeys(pending, "queued"))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers(), thread_name_prefix="prewarm")
+    for title, project in pending.items():
+        executor.submit(warm_project, title, project)
+    executor.shutdown(wait=False)
+    return True
+
+def status():
+    """Returns a copy of the warm-up state of each project ("queued", "warming", "ready" or "failed: ...")."""
+    with _lock:
+        return dict(_status)
@@ -0,0 +1,190 @@
+import argparse
+import ast
+import functools
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+PROJECTS_DIR = "projects"
+METADATA_PREFIX = "PROJECT_"
+
+_import_times = {}
+_import_lock = threading.Lock()
+
+_PROBE = (
+    "import importlib, sys, time\n"
+    "start = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "module_time = time.perf_counter() - start\n"
+    "for name in sys.argv[2:]:\n"
+    "    importlib.import_module(name)\n"
+    "print(module_time, time.perf_counter() - start - module_time)\n"
+)
+
+def read_metadata(app_path):
+    """
+    Reads the `PROJECT_*` constants declared in a project's app.py without importing it.
+
+    Only top-level assignments of literal values are considered, so the file is parsed
+    but none of its imports are executed.
+
+    Args:
+        app_path (str): Path to the project's app.py file.
+
+    Returns:
+        dict: The declared metadata with the prefix stripped and keys lowercased,
+              e.g. `PROJECT_TITLE` becomes `title`.
+    """
+    with open(app_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=app_path)
+
+    metadata = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1:
+            continue
+        target = node.targets[0]
+        if isinstance(target, ast.Name) and target.id.startswith(METADATA_PREFIX):
+            metadata[target.id[len(METADATA_PREFIX):].lower()] = ast.literal_eval(node.value)
+    return metadata
+
+@functools.lru_cache(maxsize=None)
+def discover_projects(projects_dir=PROJECTS_DIR):
+    """
+    Discovers every `projects/*/app.py` that declares a `PROJECT_TITLE`.
+
+    Args:
+        projects_dir (str, optional): The folder containing the projects. Defaults to "projects".
+
+    Returns:
+        dict: A dictionary where keys are project titles and values are dictionaries with
+              the module path and the rest of the declared metadata, sorted by `PROJECT_ORDER`.
+    """
+    entries = []
+    for folder in sorted(os.listdir(projects_dir)):
+        app_path = os.path.join(projects_dir, folder, "app.py")
+        if not os.path.isfile(app_path):
+            continue
+        metadata = read_metadata(app_path)
+        if "title" not in metadata:
+            continue
+        metadata["module"] = f"{projects_dir}.{folder}.app"
+        metadata.setdefault("order", len(entries) + 1000)
+        metadata.setdefault("heavy_imports", [])
+        entries.append(metadata)
+
+    entries.sort(key=lambda entry: entry["order"])
+    return {entry["title"]: entry for entry in entries}
+
+def import_project(module_path):
+    """
+    Imports a project module and records how long the import took.
+
+    The import always goes through `importlib.import_module`, which waits on the module's
+    import lock, so a module that a pre-warm thread is still importing is never returned
+    half executed. Only a call that found the module missing from `sys.modules` is timed.
+
+    Args:
+        module_path (str): The dotted module path of the project.
+
+    Returns:
+        module: The imported project module.
+    """
+    loaded = module_path in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(module_path)
+    elapsed = time.perf_counter() - start
+
+    if not loaded:
+        with _import_lock:
+            _import_times.setdefault(module_path, elapsed)
+    return module
+
+def import_heavy_dependencies(project):
+    """
+    Imports the heavy dependencies a project declares in `PROJECT_HEAVY_IMPORTS`.
+
+    Projects import these lazily inside the functions that use them; this helper lets
+    callers pay that cost ahead of time. Each dependency is timed like a project module.
+
+    Args:
+        project (dict): The project entry returned by `discover_projects`.
+    """
+    for name in project["heavy_imports"]:
+        import_project(name)
+
+def import_report(projects=None):
+    """
+    Builds a report of the import time recorded for each project in this process.
+
+    Args:
+        projects (dict, optional): The registry to report on. Defaults to `discover_projects()`.
+
+    Returns:
+        list: One dictionary per project with its title, module path, the seconds its module
+              took to import (None if not imported yet) and its declared heavy imports.
+    """
+    projects = projects or discover_projects()
+    with _import_lock:
+        times = dict(_import_times)
+
+    return [
+        {
+            "Project": title,
+            "Module": project["module"],
+            "Import (s)": times.get(project["module"]),
+            "Heavy imports": ", ".join(project["heavy_imports"]),
+            "Heavy imports (s)": sum(times[name] for name in project["heavy_imports"] if name in times) or None,
+        }
+        for title, project in projects.items()
+    ]
+
+def probe_cold_import(module_path, heavy_imports=()):
+    """
+    Measures the cold import cost of a module in a fresh Python interpreter.
+
+    Args:
+        module_path (str): The dotted module path to import.
+        heavy_imports (iterable, optional): Deferred dependencies to import afterwards.
+
+    Returns:
+        tuple: Seconds spent importing the module and seconds spent on the deferred dependencies.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, module_path, *heavy_imports],
+        capture_output=True, text=True, check=True,
+    )
+    module_time, heavy_time = result.stdout.split()
+    return float(module_time), float(heavy_time)
+
+def main(argv=None):
+    """
+    Prints the cold import cost of every registered project.
+
+    Run from the repository root with `python -m utils.registry`. With `--budget`, the
+    command exits with status 1 if any project module takes longer than the budget to import.
+    """
+    parser = argparse.ArgumentParser(description="Report the cold import cost of each project.")
+    parser.add_argument("--budget", type=float, help="Maximum import time in seconds for a project module.")
+    args = parser.parse_args(argv)
+
+    baseline, _ = probe_cold_import("streamlit")
+    print(f"{'Project':<28}{'Import (s)':>12}{'Heavy (s)':>12}")
+    print(f"{'(streamlit baseline)':<28}{baseline:>12.3f}{'':>12}")
+
+    over_budget = []
+    for title, project in discover_projects().items():
+        module_time, heavy_time = probe_cold_import(project["module"], project["heavy_imports"])
+        print(f"{title:<28}{module_time:>12.3f}{heavy_time:>12.3f}")
+        if args.budget is not None and module_time > args.budget:
+            over_budget.append(title)
+
+    if over_budget:
+        print(f"Over the {args.budget:.3f}s budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+BATCH_ROWS = 50_000
+PREDICTION_COLUMN = "Prediction"
+
+def file_format(name):
+    """Returns 'parquet' for Parquet file names and 'csv' otherwise."""
+    return "parquet" if os.path.splitext(name)[1].lower() in (".parquet", ".pq") else "csv"
+
+def read_columns(file, fmt):
+    """
+    Reads the column names of a CSV or Parquet file without reading its rows.
+
+    Args:
+        file: A binary file-like object. It is rewound afterwards.
+        fmt (str): 'csv' or 'parquet'.
+
+    Returns:
+        list: The column names.
+    """
+    file.seek(0)
+    if fmt == "parquet":
+        columns = pq.ParquetFile(file).schema_arrow.names
+    else:
+        columns = pd.read_csv(file, nrows=0).columns.tolist()
+    file.seek(0)
+    return columns
+
+def missing_columns(columns, features):
+    """Returns the features that are not among the columns, in feature order."""
+    present = set(columns)
+    return [feature for feature in features if feature not in present]
+
+def iter_csv_batches(file, batch_rows=BATCH_ROWS):
+    """
+    Yields the rows of a CSV file as DataFrames of at most `batch_rows` rows.
+
+    Args:
+        file: A binary file-like object positioned at the start of the file.
+        batch_rows (int, optional): Rows per batch. Defaults to 50,000.
+    """
+    with pd.read_csv(file, chunksize=batch_rows) as reader:
+        yield from reader
+
+def linear_scorer(model):
+    """
+    Returns a function scoring a feature matrix with a fitted model.
+
+    Linear models are scored with a plain dot product of their coefficients, which skips
+    the input validation scikit-learn runs on every `predict` call. Other models fall
+    back to `model.predict`.
+
+    Args:
+        model: A fitted estimator.
+
+    Returns:
+        callable: Maps a 2-D float array of features to a 1-D array of predictions.
+    """
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if coef is None or intercept is None or np.ndim(coef) != 1:
+        return model.predict
+    coef = np.asarray(coef, dtype=np.float64)
+    intercept = float(intercept)
+    return lambda X: X @ coef + intercept
+
+def predict_batch(frame, features, score):
+    """Returns the predictions of a batch, NaN where a feature is missing or not numeric, and the mask of valid rows."""
+    X = frame[features].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    valid = ~np.isnan(X).any(axis=1)
+    predictions = np.full(len(frame), np.nan)
+    if valid.any():
+        predictions[valid] = score(X[valid])
+    return predictions, valid
+
+def output_schema(schema):
+    """Returns the schema of a scored Parquet file: the input schema with a float64 `PREDICTION_COLUMN` last."""
+    if PREDICTION_COLUMN in schema.names:
+        schema = schema.remove(schema.get_field_index(PREDICTION_COLUMN))
+    return schema.append(pa.field(PREDICTION_COLUMN, pa.float64()))
+
+def score_file(file, fmt, features, score, output_path, batch_rows=BATCH_ROWS, on_batch=None):
+    """
+    Scores every row of a CSV or Parquet file in batches and streams the results to a file.
+
+    Only one batch is held in memory at a time. The output has the input columns plus
+    `PREDICTION_COLUMN`, in the input's format. Rows whose features are missing or not
+    numeric get an empty prediction. Parquet batches stay in Arrow, only their feature
+    columns are converted for scoring, and every batch is written with the schema of the
+    input file, whatever nulls it holds.
+
+    Args:
+        file: A binary file-like object positioned at the start of the input.
+        fmt (str): 'csv' or 'parquet'.
+        features (list): The feature columns, in the order the model expects them.
+        score (callable): Maps a 2-D float array of features to predictions, e.g. from `linear_scorer`.
+        output_path (str): Where to write the scored file.
+        batch_rows (int, optional): Rows per batch. Defaults to 50,000.
+        on_batch (callable, optional): Called after each batch as `on_batch(rows_scored)`.
+
+    Returns:
+        dict: The number of rows, invalid rows, batches, the scoring time and rows per second.
+    """
+    rows = invalid = batches = 0
+    writer = None
+    start = time.perf_counter()
+
+    def scored(valid):
+        nonlocal rows, invalid, batches
+        rows += len(valid)
+        invalid += int((~valid).sum())
+        batches += 1
+        if on_batch is not None:
+            on_batch(rows)
+
+    try:
+        if fmt == "parquet":
+            parquet = pq.ParquetFile(file)
+            schema = output_schema(parquet.schema_arrow)
+            writer = pq.ParquetWriter(output_path, schema)
+            for batch in parquet.iter_batches(batch_size=batch_rows):
+                predictions, valid = predict_batch(batch.select(features).to_pandas(), features, score)
+                table = pa.Table.from_batches([batch])
+                if PREDICTION_COLUMN in table.column_names:
+                    table = table.drop_columns(PREDICTION_COLUMN)
+                table = table.append_column(schema.field(PREDICTION_COLUMN), pa.array(predictions, from_pandas=True))
+                writer.write_table(table)
+                scored(valid)
+        else:
+            for batch in iter_csv_batches(file, batch_rows):
+                predictions, valid = predict_batch(batch, features, score)
+                batch[PREDICTION_COLUMN] = predictions
+                batch.to_csv(output_path, mode="w" if batches == 0 else "a", header=batches == 0, index=False)
+                scored(valid)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "invalid_rows": invalid,
+        "batches": batches,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds > 0 else float("inf"),
+    }
@@ -0,0 +1,177 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from utils import store
+
+BLOCK_ROWS = 262_144
+LSH_BITS = 16
+LSH_TABLES = 4
+MAX_CATEGORIES = 256
+
+def encode_features(frame, id_column, exclude=()):
+    """
+    Embeds the items of a table as L2-normalized float32 feature vectors, one row per item.
+
+    Categorical and text columns are one-hot encoded (their `MAX_CATEGORIES` most frequent
+    values; rarer values share no column). Numeric columns are standardized. Items listed
+    on several rows, such as a movie under two genres, get the union of their categories
+    and the mean of their numeric values.
+
+    Args:
+        frame (pd.DataFrame): The items.
+        id_column (str): The column identifying an item.
+        exclude (iterable, optional): Columns that are not features.
+
+    Returns:
+        tuple: The sorted item ids (np.ndarray), the (items, features) float32 matrix and the
+               feature names.
+    """
+    features = [column for column in frame.columns if column != id_column and column not in exclude]
+    ids = frame[id_column].astype(str)
+    parts = []
+    for column in features:
+        values = frame[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            std = values.std()
+            scaled = (values - values.mean()) / (std if std and np.isfinite(std) else 1.0)
+            parts.append(scaled.fillna(0.0).groupby(ids).mean().rename(column).to_frame())
+        else:
+            values = values.astype(str)
+            kept = values.value_counts().index[:MAX_CATEGORIES]
+            dummies = pd.get_dummies(values.where(values.isin(kept)), prefix=column, dtype=np.float32)
+            parts.append(dummies.groupby(ids).max())
+
+    encoded = pd.concat(parts, axis=1) if parts else pd.DataFrame(index=np.unique(ids))
+    matrix = encoded.to_numpy(dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix /= np.where(norms > 0, norms, 1.0)
+    return encoded.index.to_numpy(dtype=object), matrix, encoded.columns.tolist()
+
+def save_matrix(key, matrix):
+    """Stores a matrix as a `.npy` file in the columnar store folder and returns its path."""
+    os.makedirs(store.STORE_DIR, exist_ok=True)
+    path = os.path.join(store.STORE_DIR, f"{key}.npy")
+    fd, temporary = tempfile.mkstemp(dir=store.STORE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    return path
+
+def load_matrix(key):
+    """Memory-maps a matrix stored by `save_matrix`, or returns None if there is none."""
+    path = os.path.join(store.STORE_DIR, f"{key}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+
+def top_k(scores, k, exclude=()):
+    """Returns the positions of the k highest scores, best first, skipping the excluded positions."""
+    scores = np.array(scores, dtype=np.float32)
+    if len(exclude):
+        scores[np.asarray(list(exclude), dtype=np.int64)] = -np.inf
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return best[np.isfinite(scores[best])]
+
+class VectorIndex:
+    """
+    Cosine-similarity search over the rows of a normalized float32 matrix.
+
+    `exact` scores every row with matrix-vector products over blocks of `BLOCK_ROWS`, so a
+    memory-mapped matrix is streamed rather than loaded. `approximate` uses random-projection
+    LSH: each of `tables` tables hashes a row to the signs of `bits` random projections, and
+    only the rows sharing a bucket with the query in some table, or one bit away from it,
+    are scored.
+    """
+
+    def __init__(self, matrix, bits=LSH_BITS, tables=LSH_TABLES, seed=0):
+        """
+        Args:
+            matrix (np.ndarray): The (items, features) matrix with L2-normalized rows, possibly memory-mapped.
+            bits (int, optional): Projections per table, at most 32. Defaults to 16.
+            tables (int, optional): Number of hash tables. Defaults to 4.
+            seed (int, optional): Seed of the random projections.
+        """
+        start = time.perf_counter()
+        self.matrix = matrix
+        self.bits = bits
+        rng = np.random.default_rng(seed)
+        self.projections = rng.standard_normal((tables, matrix.shape[1], bits)).astype(np.float32)
+        self.weights = (1 << np.arange(bits, dtype=np.uint64)).astype(np.uint32)
+
+        codes = np.empty((tables, len(matrix)), dtype=np.uint32)
+        for block in range(0, len(matrix), BLOCK_ROWS):
+            codes[:, block:block + BLOCK_ROWS] = self._hash(np.asarray(matrix[block:block + BLOCK_ROWS]))
+        self.orders = np.argsort(codes, axis=1, kind="stable")
+        self.sorted_codes = np.take_along_axis(codes, self.orders, axis=1)
+        self.build_seconds = time.perf_counter() - start
+
+    def _hash(self, rows):
+        signs = np.einsum("nd,tdb->tnb", rows, self.projections) > 0
+        return (signs * self.weights).sum(axis=2, dtype=np.uint32)
+
+    def exact(self, query, k, exclude=()):
+        """
+        Returns the k rows most similar to a query vector, scoring every row.
+
+        Args:
+            query (np.ndarray): A normalized feature vector.
+            k (int): The number of rows to return.
+            exclude (iterable, optional): Rows that must not be returned, e.g. the query items.
+
+        Returns:
+            tuple: The row positions, best first, and their cosine similarities.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(len(self.matrix), dtype=np.float32)
+        for block in range(0, len(self.matrix), BLOCK_ROWS):
+            scores[block:block + BLOCK_ROWS] = np.asarray(self.matrix[block:block + BLOCK_ROWS]) @ query
+        rows = top_k(scores, k, exclude)
+        return rows, scores[rows]
+
+    def approximate(self, query, k, exclude=()):
+        """
+        Returns approximately the k rows most similar to a query vector, scoring only LSH candidates.
+
+        Args:
+            query (np.ndarray): A normalized feature vector.
+            k (int): The number of rows to return.
+            exclude (iterable, optional): Rows that must not be returned, e.g. the query items.
+
+        Returns:
+            tuple: The row positions, best first, their cosine similarities, and the number of
+                   candidates scored.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        codes = self._hash(query[np.newaxis])[:, 0]
+        probes = codes[:, np.newaxis] ^ np.concatenate([[0], self.weights]).astype(np.uint32)
+
+        candidates = []
+        for table, table_probes in enumerate(probes):
+            starts = np.searchsorted(self.sorted_codes[table], table_probes, side="left")
+            ends = np.searchsorted(self.sorted_codes[table], table_probes, side="right")
+            candidates.extend(self.orders[table, start:end] for start, end in zip(starts, ends))
+        candidates = np.unique(np.concatenate(candidates)) if candidates else np.empty(0, dtype=np.int64)
+
+        if len(exclude):
+            candidates = candidates[~np.isin(candidates, np.asarray(list(exclude), dtype=np.int64))]
+        scores = np.asarray(self.matrix[candidates]) @ query if len(candidates) else np.empty(0, dtype=np.float32)
+        best = top_k(scores, k)
+        return candidates[best], scores[best], len(candidates)
+
+def query_vector(matrix, rows):
+    """Returns the normalized mean of some rows of a matrix, the profile of "more like these" queries."""
+    vector = np.asarray(matrix[np.sort(np.asarray(rows, dtype=np.int64))], dtype=np.float32).mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,296 @@
+import math
+import time
+
+import numpy as np
+
+MAX_LEVEL = 14
+CELLS_PER_TILE_BITS = 3
+CLUSTER_MAX_LEVEL = 8
+MAX_QUERY_CELLS = 4096
+MAX_LATITUDE = 85.0
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+def part1by1(values):
+    """Spreads the bits of 32-bit integers apart, so bit i moves to bit 2i."""
+    values = values.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                        (2, 0x3333333333333333), (1, 0x5555555555555555)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+    return values
+
+def morton(columns, rows):
+    """Interleaves cell columns and rows into Z-order codes, so nearby cells get nearby codes."""
+    return (part1by1(columns) | (part1by1(rows) << np.uint64(1))).astype(np.int64)
+
+def cell_size(level):
+    """Returns the side in degrees of the grid cells of a level: eight cells per map tile at that zoom."""
+    return 360.0 / (1 << (level + CELLS_PER_TILE_BITS))
+
+def to_cells(lat, lon, level=MAX_LEVEL):
+    """Returns the grid column and row of coordinates at a level, clipped to the grid."""
+    size = cell_size(level)
+    columns = np.clip(np.floor((np.asarray(lon) + 180.0) / size), 0, (1 << (level + CELLS_PER_TILE_BITS)) - 1)
+    rows = np.clip(np.floor((np.asarray(lat) + 90.0) / size), 0, (1 << (level + CELLS_PER_TILE_BITS - 1)) - 1)
+    return columns.astype(np.int64), rows.astype(np.int64)
+
+def viewport(lat, lon, zoom, width=800, height=500):
+    """
+    Returns the (south, west, north, east) bounds of a web-mercator map view.
+
+    Args:
+        lat (float): The latitude of the center.
+        lon (float): The longitude of the center.
+        zoom (float): The zoom level, where the whole world is 256 pixels wide at zoom 0.
+        width (int, optional): Width of the map in pixels.
+        height (int, optional): Height of the map in pixels.
+    """
+    degrees_per_pixel = 360.0 / (256 * 2 ** zoom)
+    half_width = degrees_per_pixel * width / 2
+    half_height = degrees_per_pixel * height / 2 * math.cos(math.radians(min(abs(lat), MAX_LATITUDE)))
+    return (max(lat - half_height, -90.0), max(lon - half_width, -180.0),
+            min(lat + half_height, 90.0), min(lon + half_width, 180.0))
+
+def fit_zoom(south, west, north, east, width=800, height=500):
+    """Returns the largest whole zoom level at which a bounding box fits in a map of the given size."""
+    lon_span = max(east - west, 1e-6)
+    lat_span = max(north - south, 1e-6) / max(math.cos(math.radians(min(abs((north + south) / 2), MAX_LATITUDE))), 1e-6)
+    zoom = min(math.log2(360.0 * width / (256 * lon_span)), math.log2(360.0 * height / (256 * lat_span)))
+    return int(np.clip(math.floor(zoom), 0, MAX_LEVEL))
+
+def haversine(lat, lon, lat0, lon0):
+    """Returns the great-circle distances in km between arrays of coordinates and one point."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lat0, lon0 = math.radians(lat0), math.radians(lon0)
+    a = np.sin((lat - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lat) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def radius_bounds(lat, lon, radius_km):
+    """
+    Returns the (south, west, north, east) boxes that contain every point within a radius of a point.
+
+    The box is widened in longitude by the cosine of its most poleward latitude, spans every
+    longitude when it reaches a pole, and is split in two when it crosses the antimeridian.
+    """
+    degrees = radius_km / KM_PER_DEGREE
+    south, north = max(lat - degrees, -90.0), min(lat + degrees, 90.0)
+    if south <= -90.0 or north >= 90.0:
+        return [(south, -180.0, north, 180.0)]
+    half_width = degrees / math.cos(math.radians(max(abs(south), abs(north))))
+    if half_width >= 180.0:
+        return [(south, -180.0, north, 180.0)]
+    west, east = lon - half_width, lon + half_width
+    if west < -180.0:
+        return [(south, west + 360.0, north, 180.0), (south, -180.0, north, east)]
+    if east > 180.0:
+        return [(south, west, north, 180.0), (south, -180.0, north, east - 360.0)]
+    return [(south, west, north, east)]
+
+def aggregate(codes, counts, lat_sums, lon_sums):
+    """Merges runs of equal codes in a sorted code array, adding up their counts and coordinate sums."""
+    if not len(codes):
+        return codes, counts, lat_sums, lon_sums
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return (codes[starts], np.add.reduceat(counts, starts),
+            np.add.reduceat(lat_sums, starts), np.add.reduceat(lon_sums, starts))
+
+class GridIndex:
+    """
+    A multi-resolution grid over points, for serving the part of a map that is in view.
+
+    Points are sorted by the Z-order code of their cell in a fine grid, so every coarser cell
+    is a contiguous run of points. For each zoom level up to `CLUSTER_MAX_LEVEL`, the points are
+    also pre-aggregated into clusters, one per cell, with their count and mean position, each
+    level built from the next finer one; finer levels are clustered from the points in view. A
+    viewport query touches at most `MAX_QUERY_CELLS` cells, so its cost depends on the view, not
+    on the number of points.
+    """
+
+    def __init__(self, lat, lon, rows=None):
+        """
+        Args:
+            lat (np.ndarray): The latitudes of the points.
+            lon (np.ndarray): The longitudes of the points.
+            rows (np.ndarray, optional): The row labels of the points in their source table.
+                Defaults to their positions.
+        """
+        start = time.perf_counter()
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        rows = np.arange(len(lat)) if rows is None else np.asarray(rows)
+        codes = morton(*to_cells(lat, lon))
+        order = np.argsort(codes, kind="stable")
+
+        self.codes = codes[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.rows = rows[order]
+
+        self.levels = {}
+        clusters = aggregate(self.codes >> 2 * (MAX_LEVEL - CLUSTER_MAX_LEVEL), np.ones(len(self.codes)), self.lat, self.lon)
+        for level in range(CLUSTER_MAX_LEVEL, -1, -1):
+            level_codes, counts, lat_sums, lon_sums = clusters
+            self.levels[level] = (
+                level_codes, counts.astype(np.int32),
+                (lat_sums / counts).astype(np.float32), (lon_sums / counts).astype(np.float32),
+            )
+            clusters = aggregate(level_codes >> 2, counts, lat_sums, lon_sums)
+        self.build_seconds = time.perf_counter() - start
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        """The memory held by the index arrays, in bytes."""
+        arrays = [self.codes, self.lat, self.lon, self.rows] + [array for level in self.levels.values() for array in level]
+        return sum(array.nbytes for array in arrays)
+
+    def _cells(self, bounds, level):
+        south, west, north, east = bounds
+        (west_col, east_col), (south_row, north_row) = to_cells(np.array([south, north]), np.array([west, east]), level)
+        columns, rows = np.meshgrid(np.arange(west_col, east_col + 1), np.arange(south_row, north_row + 1))
+        return np.sort(morton(columns.ravel(), rows.ravel()))
+
+    def query_level(self, bounds):
+        """Returns the finest level at which the cells of a viewport number at most `MAX_QUERY_CELLS`."""
+        south, west, north, east = bounds
+        for level in range(MAX_LEVEL, -1, -1):
+            size = cell_size(level)
+            if ((east - west) / size + 2) * ((north - south) / size + 2) <= MAX_QUERY_CELLS:
+                return level
+        return 0
+
+    def clusters(self, bounds, level):
+        """
+        Returns the clusters of a level whose cells intersect a viewport.
+
+        Args:
+            bounds (tuple): The (south, west, north, east) of the viewport.
+            level (int): The cluster level, usually the map zoom. It is lowered if the viewport
+                would span more than `MAX_QUERY_CELLS` cells.
+
+        Returns:
+            tuple: The Z-order codes, counts, mean latitudes and mean longitudes of the clusters.
+                   Above `CLUSTER_MAX_LEVEL`, only the points inside the viewport are clustered.
+        """
+        level = min(level, self.query_level(bounds))
+        if level > CLUSTER_MAX_LEVEL:
+            positions = self.points(bounds)
+            level_codes, counts, lat_sums, lon_sums = aggregate(
+                self.codes[positions] >> 2 * (MAX_LEVEL - level), np.ones(len(positions)),
+                self.lat[positions], self.lon[positions],
+            )
+            return level_codes, counts.astype(np.int32), lat_sums / counts, lon_sums / counts
+
+        level_codes, counts, lat_means, lon_means = self.levels[level]
+        cells = self._cells(bounds, level)
+        positions = np.searchsorted(level_codes, cells)
+        found = positions < len(level_codes)
+        found[found] = level_codes[positions[found]] == cells[found]
+        positions = positions[found]
+        return level_codes[positions], counts[positions], lat_means[positions], lon_means[positions]
+
+    def count(self, bounds):
+        """
+        Returns the number of points inside a viewport.
+
+        Grid cells that lie entirely inside the viewport are counted from their clusters; only
+        the points of the cells on its border are read and checked against the exact bounds.
+        """
+        level = min(CLUSTER_MAX_LEVEL, self.query_level(bounds))
+        south, west, north, east = bounds
+        (west_col, east_col), (south_row, north_row) = to_cells(np.array([south, north]), np.array([west, east]), level)
+        columns, rows = np.meshgrid(np.arange(west_col, east_col + 1), np.arange(south_row, north_row + 1))
+        inner = (columns > west_col) & (columns < east_col) & (rows > south_row) & (rows < north_row)
+
+        level_codes, counts, _, _ = self.levels[level]
+        cells = np.sort(morton(columns[inner], rows[inner]))
+        positions = np.searchsorted(level_codes, cells)
+        found = positions < len(level_codes)
+        found[found] = level_codes[positions[found]] == cells[found]
+        total = int(counts[positions[found]].sum())
+
+        border = np.sort(morton(columns[~inner], rows[~inner]))
+        candidates = self._candidates(border, level)
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        return total + int(((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)).sum())
+
+    def _candidates(self, cells, level):
+        shift = 2 * (MAX_LEVEL - level)
+        starts = np.searchsorted(self.codes, cells << shift, side="left")
+        ends = np.searchsorted(self.codes, (cells + 1) << shift, side="left")
+        keep = ends > starts
+        starts, ends = starts[keep], ends[keep]
+        if not len(starts):
+            return np.empty(0, dtype=np.int64)
+        lengths = ends - starts
+        return np.repeat(starts - np.r_[0, np.cumsum(lengths)[:-1]], lengths) + np.arange(lengths.sum())
+
+    def points(self, bounds):
+        """
+        Returns the positions, in this index, of the points inside a viewport.
+
+        Each viewport cell is a contiguous run of the sorted points, found with two binary
+        searches; the candidates are then filtered to the exact bounds.
+
+        Args:
+            bounds (tuple): The (south, west, north, east) of the viewport.
+
+        Returns:
+            np.ndarray: Positions into `lat`, `lon` and `rows`.
+        """
+        level = self.query_level(bounds)
+        candidates = self._candidates(self._cells(bounds, level), level)
+        south, west, north, east = bounds
+        lat, lon = self.lat[candidates], self.lon[candidates]
+        return candidates[(lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)]
+
+    def within(self, lat, lon, radius_km):
+        """
+        Returns the points within a great-circle distance of a location, nearest first.
+
+        The candidates are the points of the bounding box of the circle (`radius_bounds`),
+        read from the grid like a viewport, and their exact distances are computed at once
+        with `haversine`.
+
+        Args:
+            lat (float): The latitude of the location.
+            lon (float): The longitude of the location.
+            radius_km (float): The radius in kilometers.
+
+        Returns:
+            tuple: The positions of the points, in this index, and their distances in km.
+        """
+        candidates = np.concatenate([self.points(bounds) for bounds in radius_bounds(lat, lon, radius_km)])
+        distances = haversine(self.lat[candidates], self.lon[candidates], lat, lon)
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat, lon, k):
+        """
+        Returns the k points nearest to a location, nearest first.
+
+        The search radius starts at one fine grid cell and doubles until it holds k points,
+        which are then the k nearest, so the cost depends on the local density, not on the
+        number of points.
+
+        Args:
+            lat (float): The latitude of the location.
+            lon (float): The longitude of the location.
+            k (int): The number of points to return.
+
+        Returns:
+            tuple: The positions of the points, in this index, and their distances in km.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius = cell_size(MAX_LEVEL) * KM_PER_DEGREE
+        while True:
+            positions, distances = self.within(lat, lon, radius)
+            if len(positions) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                return positions[:k], distances[:k]
+            radius *= 2
@@ -0,0 +1,402 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+PARTITION_ROWS = 65_536
+MAX_CACHED_PARTIALS = 4_096
+QUANTILE_SKETCH_K = 200
+HISTOGRAM_BINS = 30
+PROFILE_CHUNK_ROWS = 1_000_000
+DENSITY_BINS = 200
+
+def aggregate(values):
+    """
+    Computes the mergeable aggregates of an array, ignoring missing values.
+
+    Args:
+        values (np.ndarray): A 1-D float array.
+
+    Returns:
+        np.ndarray: `[count, sum, m2, min, max]`, where `m2` is the sum of squared deviations
+                    from the mean (kept instead of a raw sum of squares for numerical stability).
+    """
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.array([0.0, 0.0, 0.0, np.inf, -np.inf])
+    total = values.sum()
+    deviations = values - total / values.size
+    return np.array([values.size, total, np.dot(deviations, deviations), values.min(), values.max()])
+
+def merge(left, right):
+    """
+    Merges two aggregates as if they had been computed over the concatenated data.
+
+    Uses the pairwise update of Chan et al. for `m2`.
+    """
+    left_count, right_count = left[0], right[0]
+    if right_count == 0:
+        return left
+    if left_count == 0:
+        return right
+    count = left_count + right_count
+    delta = right[1] / right_count - left[1] / left_count
+    m2 = left[2] + right[2] + delta * delta * left_count * right_count / count
+    return np.array([count, left[1] + right[1], m2, min(left[3], right[3]), max(left[4], right[4])])
+
+def summarize(aggregates):
+    """
+    Turns aggregates into `describe()`-style statistics.
+
+    Args:
+        aggregates (np.ndarray): The output of `aggregate` or `merge`.
+
+    Returns:
+        dict: The count, mean, sample standard deviation, min and max (NaN when undefined).
+    """
+    count, total, m2, low, high = aggregates
+    return {
+        "count": count,
+        "mean": total / count if count else np.nan,
+        "std": np.sqrt(m2 / (count - 1)) if count > 1 else np.nan,
+        "min": low if count else np.nan,
+        "max": high if count else np.nan,
+    }
+
+class PartitionedStats:
+    """
+    Summary statistics of row subsets, computed from cached per-partition aggregates.
+
+    The rows are split into fixed-size partitions and the aggregates of every full
+    partition are computed once. For a row mask, fully selected partitions reuse those
+    aggregates, empty ones are skipped, and only partially selected partitions are
+    scanned, with their result cached under a digest of the partition's mask so the
+    same partial selection is never scanned twice.
+    """
+
+    def __init__(self, frame, columns, partition_rows=PARTITION_ROWS):
+        """
+        Precomputes the full-partition aggregates.
+
+        Args:
+            frame (pd.DataFrame): The data.
+            columns (iterable): The numeric columns to summarize.
+            partition_rows (int, optional): Rows per partition. Defaults to 65,536.
+        """
+        self.columns = list(columns)
+        self.rows = len(frame)
+        self.bounds = [(start, min(start + partition_rows, self.rows)) for start in range(0, self.rows, partition_rows)]
+        self.values = {column: frame[column].to_numpy(dtype=float) for column in self.columns}
+        self.full = {
+            column: [aggregate(values[start:stop]) for start, stop in self.bounds]
+            for column, values in self.values.items()
+        }
+
+    def describe(self, mask, cache):
+        """
+        Summarizes the rows selected by a mask.
+
+        Args:
+            mask (np.ndarray): A boolean mask with one entry per row.
+            cache (dict): Mutable storage for partial-partition aggregates, e.g. a dict in the
+                          session state. It is reset when used with another `PartitionedStats`
+                          or when it grows past `MAX_CACHED_PARTIALS` entries.
+
+        Returns:
+            pd.DataFrame: Count, mean, std, min and max of each column, laid out like `describe()`.
+        """
+        if cache.get("stats") is not self or len(cache["partials"]) > MAX_CACHED_PARTIALS:
+            cache.clear()
+            cache["stats"] = self
+            cache["partials"] = {}
+        partials = cache["partials"]
+
+        totals = {column: aggregate(np.empty(0)) for column in self.columns}
+        for partition, (start, stop) in enumerate(self.bounds):
+            selected = mask[start:stop]
+            count = np.count_nonzero(selected)
+            if count == 0:
+                continue
+
+            digest = None
+            if count < stop - start:
+                digest = hashlib.blake2b(np.packbits(selected).tobytes(), digest_size=16).digest()
+
+            for column in self.columns:
+                if digest is None:
+                    part = self.full[column][partition]
+                else:
+                    key = (column, partition, digest)
+                    part = partials.get(key)
+                    if part is None:
+                        part = partials[key] = aggregate(self.values[column][start:stop][selected])
+                totals[column] = merge(totals[column], part)
+
+        return pd.DataFrame({column: summarize(total) for column, total in totals.items()})
+
+class QuantileSketch:
+    """
+    A KLL-style mergeable sketch for approximate quantiles in bounded memory.
+
+    Items live in levels, where an item at level i stands for 2**i input values. When a
+    level outgrows its capacity (k at the top, shrinking by 2/3 per level below), it is
+    sorted and every other item, starting at a random offset, is promoted to the next
+    level. The rank error is about 1/k of the count while memory stays around 3k items.
+    """
+
+    def __init__(self, k=QUANTILE_SKETCH_K, seed=0):
+        """
+        Args:
+            k (int, optional): Capacity of the top level, which sets the accuracy. Defaults to 200.
+            seed (int, optional): Seed of the generator choosing the compaction offsets.
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """Adds a batch of non-missing values to the sketch."""
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                self.levels[level] = items[:odd]
+                promoted = items[odd + self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantiles(self, probabilities):
+        """
+        Estimates quantiles of the values seen so far.
+
+        Args:
+            probabilities (array-like): Quantile levels between 0 and 1.
+
+        Returns:
+            np.ndarray: The estimated quantiles (NaN if the sketch is empty).
+        """
+        values = np.concatenate(self.levels)
+        if values.size == 0:
+            return np.full(len(probabilities), np.nan)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values)
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(probabilities) * cumulative[-1], side="left")
+        return values[np.minimum(positions, len(values) - 1)]
+
+class StreamingHistogram:
+    """
+    Fixed-count histogram built in one pass without knowing the data range in advance.
+
+    The range starts as the span of the first batch. When a later batch falls outside it,
+    the range doubles towards that side and adjacent bins are merged pairwise, so every
+    count stays exact and the number of bins never changes.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        """
+        Args:
+            bins (int, optional): Number of bins, which must be even. Defaults to 30.
+        """
+        if bins % 2:
+            raise ValueError("The number of bins must be even.")
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.low = None
+        self.width = None
+
+    def _grow(self, extend_left):
+        merged = self.counts.reshape(-1, 2).sum(axis=1)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        if extend_left:
+            self.counts[self.bins // 2:] = merged
+            self.low -= self.width * self.bins
+        else:
+            self.counts[:self.bins // 2] = merged
+        self.width *= 2
+
+    def update(self, values):
+        """Adds a batch of values; non-finite values are ignored."""
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        low, high = values.min(), values.max()
+        if self.low is None:
+            self.low = low
+            span = high - low if high > low else max(abs(low), 1.0)
+            self.width = span * (1 + 1e-9) / self.bins
+
+        while low < self.low:
+            self._grow(extend_left=True)
+        while high > self.low + self.width * self.bins:
+            self._grow(extend_left=False)
+
+        index = ((values - self.low) / self.width).astype(np.int64)
+        np.clip(index, 0, self.bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=self.bins)
+
+    def to_frame(self):
+        """
+        Returns the non-empty span of the histogram as a DataFrame.
+
+        Returns:
+            pd.DataFrame: One row per bin with `bin_start`, `bin_end`, `bin_center` and `count`,
+                          without the empty bins at either end.
+        """
+        if self.low is None:
+            return pd.DataFrame(columns=["bin_start", "bin_end", "bin_center", "count"])
+        filled = np.flatnonzero(self.counts)
+        first, last = filled[0], filled[-1] + 1
+        starts = self.low + self.width * np.arange(first, last)
+        return pd.DataFrame({
+            "bin_start": starts,
+            "bin_end": starts + self.width,
+            "bin_center": starts + self.width / 2,
+            "count": self.counts[first:last],
+        })
+
+class StreamingSummary:
+    """
+    Moments, approximate quantiles and a histogram of a numeric column, built in one pass.
+
+    Each batch updates the count/sum/M2/min/max aggregates (Welford's update applied per
+    batch, merged with `merge`), a `QuantileSketch` and a `StreamingHistogram`. The result
+    is O(bins + k) in size whatever the number of rows.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS, k=QUANTILE_SKETCH_K):
+        self.moments = aggregate(np.empty(0))
+        self.sketch = QuantileSketch(k)
+        self.histogram = StreamingHistogram(bins)
+
+    def update(self, values):
+        """Adds a batch of values; missing values are ignored."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.moments = merge(self.moments, aggregate(values))
+        self.sketch.update(values)
+        self.histogram.update(values)
+        return self
+
+    def describe(self):
+        """Returns `describe()`-style statistics, with the quartiles taken from the sketch."""
+        summary = summarize(self.moments)
+        quartiles = self.sketch.quantiles([0.25, 0.5, 0.75])
+        return {
+            "count": summary["count"],
+            "mean": summary["mean"],
+            "std": summary["std"],
+            "min": summary["min"],
+            "25%": quartiles[0],
+            "50%": quartiles[1],
+            "75%": quartiles[2],
+            "max": summary["max"],
+        }
+
+def profile(values, bins=HISTOGRAM_BINS, chunk_rows=PROFILE_CHUNK_ROWS):
+    """
+    Summarizes a numeric array in one chunked pass.
+
+    Args:
+        values (np.ndarray): The column values.
+        bins (int, optional): Number of histogram bins. Defaults to 30.
+        chunk_rows (int, optional): Rows per batch. Defaults to 1,000,000.
+
+    Returns:
+        StreamingSummary: The summary of the values.
+    """
+    summary = StreamingSummary(bins)
+    for start in range(0, len(values), chunk_rows):
+        summary.update(values[start:start + chunk_rows])
+    return summary
+
+def describe_frame(frame):
+    """
+    Builds a `describe()`-style table of the numeric columns from streaming summaries.
+
+    Args:
+        frame (pd.DataFrame): The data.
+
+    Returns:
+        pd.DataFrame: Count, mean, std, min, approximate quartiles and max of each numeric column.
+    """
+    numeric = frame.select_dtypes(include=["number"])
+    return pd.DataFrame({
+        column: profile(numeric[column].to_numpy(dtype=float)).describe()
+        for column in numeric.columns
+    })
+
+def density_grid(x, y, x_range, y_range, bins=DENSITY_BINS):
+    """
+    Counts the points falling in each cell of a regular 2-D grid.
+
+    Args:
+        x (np.ndarray): The x coordinates.
+        y (np.ndarray): The y coordinates.
+        x_range (tuple): The (min, max) of the grid along x.
+        y_range (tuple): The (min, max) of the grid along y.
+        bins (int, optional): Cells per axis. Defaults to 200.
+
+    Returns:
+        tuple: The counts with one row per y cell and one column per x cell, and the
+               cell centers along x and along y.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite], bins=bins, range=[x_range, y_range])
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+
+def stratified_sample(x, y, x_range, y_range, max_points, bins=DENSITY_BINS, seed=0):
+    """
+    Samples the points inside a window so that sparse regions keep all their points.
+
+    The window is split into a `bins` x `bins` grid and every cell keeps at most the same
+    number of randomly chosen points, with that cap set as high as `max_points` allows.
+    Dense clusters are thinned while outliers and sparse areas stay visible.
+
+    Args:
+        x (np.ndarray): The x coordinates.
+        y (np.ndarray): The y coordinates.
+        x_range (tuple): The (min, max) of the window along x.
+        y_range (tuple): The (min, max) of the window along y.
+        max_points (int): The maximum number of points to return.
+        bins (int, optional): Cells per axis. Defaults to 200.
+        seed (int, optional): Seed of the random choice within cells.
+
+    Returns:
+        np.ndarray: The row numbers of the sampled points, in ascending order.
+    """
+    inside = np.flatnonzero(
+        (x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1])
+    )
+    if len(inside) <= max_points:
+        return inside
+
+    inside = np.random.default_rng(seed).permutation(inside)
+    x_span = (x_range[1] - x_range[0]) or 1.0
+    y_span = (y_range[1] - y_range[0]) or 1.0
+    column = np.minimum(((x[inside] - x_range[0]) / x_span * bins).astype(np.int64), bins - 1)
+    row = np.minimum(((y[inside] - y_range[0]) / y_span * bins).astype(np.int64), bins - 1)
+    cell = row * bins + column
+
+    counts = np.bincount(cell, minlength=bins * bins)
+    sorted_counts = np.sort(counts[counts > 0])
+    cumulative = np.cumsum(sorted_counts)
+    larger = np.arange(len(sorted_counts) - 1, -1, -1)
+    fully_kept = np.searchsorted(cumulative + sorted_counts * larger, max_points, side="right")
+    below = cumulative[fully_kept - 1] if fully_kept else 0
+    cap = max(int((max_points - below) // (len(sorted_counts) - fully_kept)), 1)
+
+    order = np.argsort(cell, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)])[cell[order]]
+    rank = np.arange(len(order)) - starts
+    return np.sort(inside[order[rank < cap]])
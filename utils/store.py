@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+STORE_DIR = os.getenv("DATASET_STORE_DIR", os.path.join("data", ".store"))
+STORE_MAX_BYTES = int(os.getenv("DATASET_STORE_MAX_MB", "2048")) * 1024 * 1024
+HASH_BLOCK_BYTES = 8 * 1024 * 1024
+
+_file_keys = {}
+_lock = threading.Lock()
+
+def store_path(key):
+    """Returns the path of the columnar file stored under a key."""
+    return os.path.join(STORE_DIR, f"{key}.arrow")
+
+def has(key):
+    """Returns True if a columnar copy is stored under the key."""
+    return os.path.exists(store_path(key))
+
+def file_key(path, categorical=()):
+    """
+    Returns the store key of a CSV file: a hash of its content and of the categorical columns requested.
+
+    The content hash is memoized on the file's modification time and size, so only
+    the first load of each file version reads the bytes.
+
+    Args:
+        path (str): Path to the CSV file.
+        categorical (iterable, optional): Columns parsed as categoricals, which change the stored types.
+
+    Returns:
+        str: The hex digest used as the store key.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _file_keys.get(path)
+    if cached is not None and cached[0] == signature:
+        content = cached[1]
+    else:
+        digest = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+                digest.update(block)
+        content = digest.hexdigest()
+        with _lock:
+            _file_keys[path] = (signature, content)
+
+    if not categorical:
+        return content
+    return hashlib.blake2b(f"{content}:{','.join(categorical)}".encode(), digest_size=20).hexdigest()
+
+def write_frame(key, frame):
+    """
+    Stores a DataFrame as an uncompressed Arrow IPC (Feather v2) file.
+
+    The file is written to a temporary name and renamed into place, so concurrent readers
+    never see a partial file. The oldest files are removed once the store exceeds
+    `DATASET_STORE_MAX_MB`.
+
+    Args:
+        key (str): The store key.
+        frame (pd.DataFrame): The data to store. Its index is not stored.
+    """
+    os.makedirs(STORE_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    fd, temporary = tempfile.mkstemp(dir=STORE_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(table, temporary, compression="uncompressed")
+        os.replace(temporary, store_path(key))
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+    prune()
+
+def read_frame(key, columns=None):
+    """
+    Reads a stored DataFrame through a memory map.
+
+    Uncompressed Arrow buffers are mapped rather than copied, and numeric columns without
+    missing values are handed to pandas without a copy, so sessions and processes reading
+    the same key share those pages through the OS cache.
+
+    Args:
+        key (str): The store key.
+        columns (list, optional): Columns to return; names missing from the file are skipped.
+
+    Returns:
+        pd.DataFrame: The stored data.
+    """
+    path = store_path(key)
+    table = feather.read_table(path, memory_map=True)
+    if columns is not None:
+        table = table.select([column for column in columns if column in table.column_names])
+    os.utime(path)
+    return table.to_pandas(split_blocks=True)
+
+def prune(max_bytes=STORE_MAX_BYTES):
+    """Deletes the least recently used files, columnar copies and vector matrices, until the store fits in `max_bytes`."""
+    entries = []
+    for name in os.listdir(STORE_DIR):
+        if name.endswith((".arrow", ".npy")):
+            try:
+                stat = os.stat(os.path.join(STORE_DIR, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(STORE_DIR, name))
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def read_csv(path, columns=None, categorical=()):
+    """
+    Loads a CSV file through the columnar store.
+
+    The first load of a file version parses the CSV and stores a columnar copy; later loads,
+    including those from other processes or after a restart, read that copy instead. If the
+    store cannot be written, the parsed frame is returned anyway.
+
+    Args:
+        path (str): Path to the CSV file.
+        columns (list, optional): Columns to return; names missing from the file are skipped.
+        categorical (iterable, optional): Columns to parse as pandas categoricals.
+
+    Returns:
+        pd.DataFrame: The data.
+    """
+    categorical = tuple(categorical)
+    key = file_key(path, categorical)
+    if has(key):
+        try:
+            return read_frame(key, columns)
+        except FileNotFoundError:
+            pass
+
+    frame = pd.read_csv(path, dtype=dict.fromkeys(categorical, "category"))
+    try:
+        write_frame(key, frame)
+    except (OSError, pa.ArrowException):
+        pass
+    if columns is not None:
+        frame = frame[[column for column in columns if column in frame.columns]]
+    return frame
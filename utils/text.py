@@ -0,0 +1,275 @@
+import heapq
+import re
+from collections import Counter, deque
+from operator import itemgetter
+
+TOKEN_PATTERN = re.compile(r"\b\w+\b")
+WORD_CHAR = re.compile(r"\w")
+COMPARE_BLOCK = 4096
+STREAM_CHUNK_BYTES = 8 * 1024 * 1024
+WHITESPACE_BYTES = b" \t\r\n\f\v"
+NON_WORD_BYTE = re.compile(rb"[\x00-\x2f\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]")
+
+STOP_WORDS = frozenset(
+    "a about above after again against all am an and any are as at be because been before being below "
+    "between both but by can could did do does doing down during each few for from further had has have "
+    "having he her here hers herself him himself his how i if in into is it its itself just me more most "
+    "my myself no nor not now of off on once only or other our ours ourselves out over own same she "
+    "should so some such than that the their theirs them themselves then there these they this those "
+    "through to too under until up very was we were what when where which while who whom why will with "
+    "would you your yours yourself yourselves".split()
+)
+
+def tokenize(text):
+    """Returns the lowercased words of a text, as matched by `TOKEN_PATTERN`."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def common_prefix(a, b):
+    """
+    Returns the length of the longest common prefix of two strings.
+
+    Blocks of `COMPARE_BLOCK` characters are compared at C speed, and only the first
+    differing block is scanned character by character.
+    """
+    limit = min(len(a), len(b))
+    i = 0
+    while i + COMPARE_BLOCK <= limit and a[i:i + COMPARE_BLOCK] == b[i:i + COMPARE_BLOCK]:
+        i += COMPARE_BLOCK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+def common_suffix(a, b, limit):
+    """Returns the length of the longest common suffix of two strings, at most `limit`, like `common_prefix`."""
+    i = 0
+    while i + COMPARE_BLOCK <= limit and a[len(a) - i - COMPARE_BLOCK:len(a) - i] == b[len(b) - i - COMPARE_BLOCK:len(b) - i]:
+        i += COMPARE_BLOCK
+    while i < limit and a[-i - 1] == b[-i - 1]:
+        i += 1
+    return i
+
+class IncrementalAnalyzer:
+    """
+    Word statistics of a text that is edited a little at a time, e.g. on every keystroke.
+
+    Each update diffs the new text against the previous one, re-tokenizes only the changed
+    span widened to the words it touches, and applies the difference to the counts. The top
+    words are read from a heap of (count, word) entries that is pushed on every change and
+    cleaned lazily, so an edit costs in proportion to its size rather than to the document.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.word_count = 0
+        self.word_freq = Counter()
+        self._heap = []
+
+    @property
+    def char_count(self):
+        """The number of characters of the current text."""
+        return len(self.text)
+
+    def update(self, text):
+        """
+        Brings the statistics up to date with a new version of the text.
+
+        Args:
+            text (str): The full new text.
+
+        Returns:
+            IncrementalAnalyzer: The analyzer itself.
+        """
+        old = self.text
+        if text == old:
+            return self
+
+        start = common_prefix(old, text)
+        suffix = common_suffix(old, text, min(len(old), len(text)) - start)
+        old_end, new_end = len(old) - suffix, len(text) - suffix
+
+        while start > 0 and WORD_CHAR.match(text[start - 1]):
+            start -= 1
+        while new_end < len(text) and WORD_CHAR.match(text[new_end]):
+            old_end += 1
+            new_end += 1
+
+        removed = tokenize(old[start:old_end])
+        added = tokenize(text[start:new_end])
+        self.word_count += len(added) - len(removed)
+
+        delta = Counter(added)
+        delta.subtract(removed)
+        for word, change in delta.items():
+            if change == 0:
+                continue
+            count = self.word_freq[word] + change
+            if count > 0:
+                self.word_freq[word] = count
+                heapq.heappush(self._heap, (-count, word))
+            else:
+                del self.word_freq[word]
+
+        if len(self._heap) > 2 * len(self.word_freq) + 64:
+            self._heap = [(-count, word) for word, count in self.word_freq.items()]
+            heapq.heapify(self._heap)
+        self.text = text
+        return self
+
+    def top_words(self, k=5):
+        """
+        Returns the k most frequent words, ties broken alphabetically.
+
+        Returns:
+            list: (word, count) tuples in decreasing order of count.
+        """
+        top = []
+        while self._heap and len(top) < k:
+            count, word = heapq.heappop(self._heap)
+            if self.word_freq.get(word) == -count and (not top or top[-1][1] != word):
+                top.append((count, word))
+        for entry in top:
+            heapq.heappush(self._heap, entry)
+        return [(word, -count) for count, word in top]
+
+def split_point(block):
+    """
+    Returns where to cut a block that has no whitespace.
+
+    The cut falls after the last ASCII byte that is not a word character, such as
+    punctuation, which is a word boundary for `TOKEN_PATTERN`. Without one, the block is cut
+    before its last UTF-8 character, so no multi-byte sequence is split; the word running
+    across the cut is then counted as two words.
+    """
+    match = NON_WORD_BYTE.search(block[::-1])
+    if match is not None:
+        return len(block) - match.start()
+    for i in range(len(block) - 1, max(len(block) - 5, 0), -1):
+        if block[i] & 0xC0 != 0x80:
+            return i
+    return len(block)
+
+def iter_chunks(file, chunk_bytes=STREAM_CHUNK_BYTES):
+    """
+    Reads a binary file in blocks that end on whitespace, so words are not split across blocks.
+
+    Splitting on ASCII whitespace bytes is also safe for UTF-8, whose multi-byte sequences
+    never contain them. A block without any whitespace is carried into the next one until
+    it reaches four times `chunk_bytes`, and is then cut at `split_point`: on punctuation if
+    it has any, otherwise between two characters, which splits the one word longer than
+    the whole block. The text must be in UTF-8 or another ASCII-compatible encoding.
+
+    Args:
+        file: A binary file-like object.
+        chunk_bytes (int, optional): Bytes read per block. Defaults to 8 MiB.
+
+    Yields:
+        bytes: The blocks, in file order.
+    """
+    carry = b""
+    for block in iter(lambda: file.read(chunk_bytes), b""):
+        block = carry + block
+        cut = max(block.rfind(byte) for byte in WHITESPACE_BYTES)
+        if cut < 0 and len(block) < 4 * chunk_bytes:
+            carry = block
+            continue
+        cut = split_point(block) if cut < 0 else cut + 1
+        carry = block[cut:]
+        yield block[:cut]
+    if carry:
+        yield carry
+
+def ngrams(tokens, n):
+    """Returns the space-joined n-grams of a token list, or the tokens themselves when n is 1."""
+    if n == 1:
+        return tokens
+    return [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+
+def count_chunk(chunk, encoding="utf-8", stop_words=frozenset(), n=1):
+    """
+    Counts the words and n-grams of one block of a document.
+
+    This is the map step of `analyze_stream` and runs in a worker process.
+
+    Args:
+        chunk (bytes): The encoded block.
+        encoding (str, optional): The text encoding. Undecodable bytes are replaced.
+        stop_words (frozenset, optional): Words left out of the frequencies and n-grams.
+        n (int, optional): The n-gram length. Defaults to 1 (single words).
+
+    Returns:
+        tuple: The term frequencies, the word and character counts, and the first and last
+               n - 1 filtered tokens, which `analyze_stream` joins into the n-grams that
+               cross block boundaries.
+    """
+    text = chunk.decode(encoding, errors="replace")
+    words = tokenize(text)
+    tokens = [word for word in words if word not in stop_words] if stop_words else words
+    edge = n - 1
+    return Counter(ngrams(tokens, n)), len(words), len(text), tokens[:edge], tokens[len(tokens) - edge:] if edge else []
+
+def top_terms(freq, k):
+    """Returns the k most frequent (term, count) pairs, selected with a bounded heap."""
+    return heapq.nlargest(k, freq.items(), key=itemgetter(1))
+
+def analyze_stream(file, encoding="utf-8", stop_words=frozenset(), n=1, top=20,
+                   executor=None, in_flight=4, chunk_bytes=STREAM_CHUNK_BYTES, on_chunk=None):
+    """
+    Computes word statistics of a large document without holding it in memory.
+
+    The file is read in whitespace-aligned blocks (`iter_chunks`). Each block is counted
+    by `count_chunk`, on the executor when one is given, and the partial `Counter`s are
+    merged in file order. At most `in_flight` blocks are submitted ahead of the merge, so
+    memory holds a few blocks and the merged vocabulary, not the document.
+    N-grams that cross block boundaries are counted from the edge tokens of each block.
+    The top terms are selected with a bounded heap instead of sorting the vocabulary.
+
+    Args:
+        file: A binary file-like object.
+        encoding (str, optional): The text encoding. Defaults to UTF-8.
+        stop_words (frozenset, optional): Words left out of the frequencies and n-grams.
+        n (int, optional): The n-gram length. Defaults to 1 (single words).
+        top (int, optional): How many of the most frequent terms to return. Defaults to 20.
+        executor (concurrent.futures.Executor, optional): Where blocks are counted. Defaults
+            to counting them in this process.
+        in_flight (int, optional): Blocks submitted to the executor ahead of the merge. Defaults to 4.
+        chunk_bytes (int, optional): Bytes per block. Defaults to 8 MiB.
+        on_chunk (callable, optional): Called after each merged block as `on_chunk(bytes_read)`.
+
+    Returns:
+        tuple: The word count, the character count, the merged term frequencies, and the
+               top (term, count) pairs in decreasing order of count.
+    """
+    freq = Counter()
+    word_count = char_count = bytes_read = 0
+    tail = []
+    edge = n - 1
+
+    def merge(result, size):
+        nonlocal word_count, char_count, bytes_read, tail
+        counts, words, chars, head, last = result
+        freq.update(counts)
+        word_count += words
+        char_count += chars
+        bytes_read += size
+        if edge:
+            joined = tail + head
+            freq.update(" ".join(joined[i:i + n]) for i in range(min(len(tail), len(joined) - n + 1)))
+            tail = (joined if len(head) < edge else last)[-edge:]
+        if on_chunk is not None:
+            on_chunk(bytes_read)
+
+    if executor is None:
+        for chunk in iter_chunks(file, chunk_bytes):
+            merge(count_chunk(chunk, encoding, stop_words, n), len(chunk))
+    else:
+        pending = deque()
+        for chunk in iter_chunks(file, chunk_bytes):
+            pending.append((executor.submit(count_chunk, chunk, encoding, stop_words, n), len(chunk)))
+            if len(pending) >= in_flight:
+                future, size = pending.popleft()
+                merge(future.result(), size)
+        while pending:
+            future, size = pending.popleft()
+            merge(future.result(), size)
+
+    return word_count, char_count, freq, top_terms(freq, top)
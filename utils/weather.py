@@ -0,0 +1,296 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = "http://api.openweathermap.org/data/2.5/weather"
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+RETRIES = 2
+POOL_SIZE = 32
+CACHE_MAX_ENTRIES = 4096
+LATENCY_WINDOW = 10_000
+BULK_CONCURRENCY = 32
+BULK_RATE = 100.0
+
+def api_url():
+    """Returns the weather endpoint, read from `WEATHER_API_URL` so it can point at the local stub."""
+    return os.getenv("WEATHER_API_URL", API_URL)
+
+def cache_ttl():
+    """Returns how many seconds a weather response is reused, read from `WEATHER_CACHE_TTL` (default 600)."""
+    try:
+        return max(0.0, float(os.getenv("WEATHER_CACHE_TTL", "600")))
+    except ValueError:
+        return 600.0
+
+def percentile(values, q):
+    """Returns the q-th percentile of a sequence in milliseconds, or None if it is empty."""
+    return round(float(np.percentile(np.asarray(values) * 1000, q)), 3) if len(values) else None
+
+class WeatherClient:
+    """
+    A thread-safe client of the OpenWeatherMap current weather endpoint.
+
+    All calls share one `requests.Session`, so connections are pooled and kept alive instead
+    of paying a TCP/TLS handshake per search. Every request has a connect and a read timeout,
+    and connection errors, 429 and 5xx responses are retried a bounded number of times with
+    exponential backoff. Successful responses are cached per (city, country) for `ttl` seconds,
+    and concurrent calls for the same location wait for a single upstream request. If that
+    request is interrupted, e.g. by a rerun of the calling script, the waiting calls get an
+    error instead of blocking, and the next call starts a new request.
+    """
+
+    def __init__(self, api_key, url=API_URL, ttl=600.0, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 retries=RETRIES, pool_size=POOL_SIZE):
+        """
+        Args:
+            api_key (str): The OpenWeatherMap API key.
+            url (str, optional): The current weather endpoint.
+            ttl (float, optional): Seconds a successful response is reused. 0 disables the cache.
+            timeout (tuple, optional): The connect and read timeouts in seconds.
+            retries (int, optional): Retries after the first attempt.
+            pool_size (int, optional): Connections kept open to the host. Requests beyond it
+                wait for a free connection instead of opening throwaway ones.
+        """
+        self.api_key = api_key
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries, connect=retries, read=retries, status=retries,
+            backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}), raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "hits": 0, "coalesced": 0, "upstream": 0, "errors": 0}
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._upstream_latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def get(self, city, country="us"):
+        """
+        Returns the current weather of a city, from the cache when it is fresh.
+
+        Args:
+            city (str): The name of the city.
+            country (str, optional): The country code (default is "us" for the United States).
+
+        Returns:
+            dict: The API response, or a dictionary with an `error` message if the request
+                  failed. Errors are not cached.
+        """
+        start = time.perf_counter()
+        key = (city.strip().lower(), country.strip().lower())
+        with self._lock:
+            self._counts["calls"] += 1
+            data = self._fresh(key)
+            if data is not None:
+                self._latencies.append(time.perf_counter() - start)
+                return data
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self._counts["coalesced"] += 1
+
+        if leader:
+            data = None
+            try:
+                data = self._fetch(city, country)
+            except Exception as e:
+                data = {"error": f"Request failed: {e}"}
+            finally:
+                with self._lock:
+                    if data is not None and "error" in data:
+                        self._counts["errors"] += 1
+                    elif data is not None and self.ttl > 0:
+                        self._cache[key] = (time.monotonic() + self.ttl, data)
+                        self._cache.move_to_end(key)
+                        while len(self._cache) > CACHE_MAX_ENTRIES:
+                            self._cache.popitem(last=False)
+                    del self._inflight[key]
+                if data is None:
+                    future.set_exception(RuntimeError("The request was interrupted."))
+                else:
+                    future.set_result(data)
+        else:
+            try:
+                data = future.result()
+            except RuntimeError as e:
+                data = {"error": str(e)}
+
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return data
+
+    def cached(self, city, country="us"):
+        """Returns the cached weather of a city if it is fresh, counted as a call and a hit, or None."""
+        key = (city.strip().lower(), country.strip().lower())
+        with self._lock:
+            data = self._fresh(key)
+            if data is not None:
+                self._counts["calls"] += 1
+                self._latencies.append(0.0)
+            return data
+
+    def _fresh(self, key):
+        entry = self._cache.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._cache.move_to_end(key)
+        self._counts["hits"] += 1
+        return entry[1]
+
+    def _fetch(self, city, country):
+        params = {
+            "q": f"{city},{country}" if country.strip() else city,
+            "appid": self.api_key,
+            "units": "metric",
+            "lang": "en"
+        }
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+        except requests.Timeout:
+            return {"error": "The weather service did not respond in time."}
+        except requests.RequestException as e:
+            return {"error": f"Could not reach the weather service: {e}"}
+        finally:
+            with self._lock:
+                self._counts["upstream"] += 1
+                self._upstream_latencies.append(time.perf_counter() - start)
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code == 200:
+            return data
+        error_msg = data.get("message", "Unknown error") if isinstance(data, dict) else "Unknown error"
+        return {"error": f"Error {response.status_code}: {error_msg}"}
+
+    def clear(self):
+        """Drops every cached response."""
+        with self._lock:
+            self._cache.clear()
+
+    def metrics(self):
+        """
+        Returns the call counts, cache hit rate and latency percentiles of the client.
+
+        Returns:
+            dict: The counts of calls, cache hits, coalesced calls, upstream requests and errors,
+                  the hit rate, and the p50/p99 latency in milliseconds of recent calls and of
+                  recent upstream requests.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = list(self._latencies)
+            upstream = list(self._upstream_latencies)
+            cached = len(self._cache)
+        return {
+            **counts,
+            "cached": cached,
+            "hit_rate": round(counts["hits"] / counts["calls"], 4) if counts["calls"] else None,
+            "p50_ms": percentile(latencies, 50),
+            "p99_ms": percentile(latencies, 99),
+            "upstream_p50_ms": percentile(upstream, 50),
+            "upstream_p99_ms": percentile(upstream, 99),
+        }
+
+class TokenBucket:
+    """
+    An asyncio rate limiter: `rate` tokens per second, with bursts of up to `capacity`.
+
+    Waiters take turns, so the limit holds however many coroutines call `acquire`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def fetch_many(client, locations, concurrency=BULK_CONCURRENCY, rate=BULK_RATE, on_result=None):
+    """
+    Fetches the weather of many locations concurrently, reporting each result as it arrives.
+
+    Fresh cached answers are reported immediately. The other lookups run on a thread pool of
+    `concurrency` workers through the client, so they share its connection pool, cache and
+    request coalescing, and upstream requests start no faster than `rate` per second. The
+    concurrency is capped at the client's `pool_size`, since more workers would only wait
+    for a connection. The total time is close to that of the slowest calls rather than the
+    sum of all of them.
+
+    Args:
+        client (WeatherClient): The client to fetch through.
+        locations (list): (city, country) pairs. An empty country searches by city name only.
+        concurrency (int, optional): Maximum requests in flight, at most `client.pool_size`.
+            Defaults to 32.
+        rate (float, optional): Maximum upstream requests started per second; 0 disables the limit.
+            Defaults to 100.
+        on_result (callable, optional): Called on the event loop as `on_result(position, data, seconds)`
+            in completion order, where `seconds` is the time of the call itself, without queueing.
+
+    Returns:
+        list: The responses, in the order of `locations`.
+    """
+    concurrency = max(1, min(concurrency, client.pool_size))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate) if rate else None
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="weather")
+
+    async def fetch(position, city, country):
+        start = time.perf_counter()
+        data = client.cached(city, country)
+        if data is None:
+            async with semaphore:
+                if bucket is not None:
+                    await bucket.acquire()
+                start = time.perf_counter()
+                data = await loop.run_in_executor(executor, client.get, city, country)
+        return position, data, time.perf_counter() - start
+
+    tasks = [asyncio.ensure_future(fetch(position, city, country)) for position, (city, country) in enumerate(locations)]
+    results = [None] * len(tasks)
+    try:
+        for next_result in asyncio.as_completed(tasks):
+            position, data, seconds = await next_result
+            results[position] = data
+            if on_result is not None:
+                on_result(position, data, seconds)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
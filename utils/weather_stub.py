@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils import weather
+
+UNKNOWN_CITIES = {"nowhere"}
+CONDITIONS = ["clear sky", "few clouds", "scattered clouds", "light rain", "moderate rain", "mist", "snow"]
+
+def fake_weather(city, country):
+    """
+    Returns a deterministic OpenWeatherMap-style response for a location.
+
+    The values are derived from a hash of the location, so repeated requests for the same
+    city get the same answer.
+    """
+    seed = int.from_bytes(hashlib.blake2b(f"{city},{country}".lower().encode(), digest_size=8).digest(), "big")
+    rng = random.Random(seed)
+    temp = round(rng.uniform(-10, 35), 2)
+    return {
+        "name": city.title(),
+        "sys": {"country": country.upper()},
+        "coord": {"lat": round(rng.uniform(-60, 70), 4), "lon": round(rng.uniform(-180, 180), 4)},
+        "main": {
+            "temp": temp,
+            "temp_min": round(temp - rng.uniform(0, 5), 2),
+            "temp_max": round(temp + rng.uniform(0, 5), 2),
+            "humidity": rng.randint(10, 100),
+        },
+        "weather": [{"description": rng.choice(CONDITIONS)}],
+    }
+
+def make_server(host="127.0.0.1", port=8765, latency=0.05, jitter=0.05, error_rate=0.0):
+    """
+    Creates a local server that imitates the OpenWeatherMap current weather endpoint.
+
+    Every response is delayed by `latency` plus an exponentially distributed `jitter`, so
+    the tail latency resembles a remote service. Cities in `UNKNOWN_CITIES` get a 404, and
+    a share of `error_rate` requests get a 503 to exercise the client's retries.
+
+    Args:
+        host (str, optional): The interface to listen on. Defaults to 127.0.0.1.
+        port (int, optional): The port to listen on; 0 picks a free port. Defaults to 8765.
+        latency (float, optional): Minimum delay of each response in seconds.
+        jitter (float, optional): Mean of the extra exponential delay in seconds.
+        error_rate (float, optional): Share of requests answered with a 503.
+
+    Returns:
+        ThreadingHTTPServer: The server, not yet serving. Its `requests` attribute counts the requests received.
+    """
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            with lock:
+                server.requests += 1
+            time.sleep(latency + (random.expovariate(1 / jitter) if jitter > 0 else 0))
+
+            query = parse_qs(urlparse(self.path).query)
+            city, _, country = query.get("q", [""])[0].partition(",")
+            if random.random() < error_rate:
+                self.reply(503, {"cod": 503, "message": "service unavailable"})
+            elif not city or city.strip().lower() in UNKNOWN_CITIES:
+                self.reply(404, {"cod": "404", "message": "city not found"})
+            else:
+                self.reply(200, fake_weather(city.strip(), country.strip() or "us"))
+
+        def reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    return server
+
+def benchmark(client, calls=2000, cities=200, threads=16, skew=1.1, seed=0):
+    """
+    Replays a skewed mix of city lookups against a client from several threads.
+
+    Cities are drawn from a Zipf-like distribution, so a few popular cities account for
+    most lookups, as they do for real users.
+
+    Args:
+        client (weather.WeatherClient): The client to measure.
+        calls (int, optional): Number of lookups.
+        cities (int, optional): Number of distinct cities.
+        threads (int, optional): Concurrent callers.
+        skew (float, optional): Exponent of the popularity distribution.
+        seed (int, optional): Seed of the lookup order.
+
+    Returns:
+        dict: The client metrics after the run, with the wall time in seconds.
+    """
+    rng = random.Random(seed)
+    weights = [1 / rank ** skew for rank in range(1, cities + 1)]
+    lookups = rng.choices([f"city{rank}" for rank in range(cities)], weights=weights, k=calls)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(client.get, lookups))
+    return {**client.metrics(), "seconds": round(time.perf_counter() - start, 3)}
+
+def benchmark_bulk(client, cities=200, concurrency=weather.BULK_CONCURRENCY, rate=weather.BULK_RATE):
+    """
+    Fetches many distinct cities at once with `weather.fetch_many`.
+
+    Returns:
+        dict: The wall time, the sum of the per-city times (what sequential fetching would
+              cost), and the slowest single call, in seconds.
+    """
+    durations = []
+    start = time.perf_counter()
+    asyncio.run(weather.fetch_many(
+        client, [(f"city{rank}", "us") for rank in range(cities)], concurrency, rate,
+        on_result=lambda position, data, seconds: durations.append(seconds),
+    ))
+    return {
+        "seconds": round(time.perf_counter() - start, 3),
+        "sum_of_calls": round(sum(durations), 3),
+        "slowest_call": round(max(durations, default=0.0), 3),
+    }
+
+def main(argv=None):
+    """
+    Serves the stub, or benchmarks the weather client against it.
+
+    Run from the repository root with `python -m utils.weather_stub` and point the app at it
+    with `WEATHER_API_URL=http://127.0.0.1:8765/data/2.5/weather`. With `--benchmark`, the
+    stub is started on a free port and the client's hit rate and latency percentiles are printed.
+    With `--bulk`, the wall time of fetching `--cities` distinct cities concurrently is printed instead.
+    """
+    parser = argparse.ArgumentParser(description="Local stub of the OpenWeatherMap current weather endpoint.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Minimum response delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Mean extra exponential delay in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark the client instead of serving.")
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ttl", type=float, default=600.0, help="Client cache TTL in seconds.")
+    parser.add_argument("--bulk", action="store_true", help="Benchmark a concurrent fetch of distinct cities.")
+    parser.add_argument("--concurrency", type=int, default=weather.BULK_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=weather.BULK_RATE, help="Bulk requests per second.")
+    args = parser.parse_args(argv)
+
+    server = make_server(port=0 if args.benchmark or args.bulk else args.port, latency=args.latency,
+                         jitter=args.jitter, error_rate=args.error_rate)
+    if not (args.benchmark or args.bulk):
+        print(f"Serving on http://127.0.0.1:{server.server_address[1]}/data/2.5/weather")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = weather.WeatherClient("stub", f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather",
+                                   ttl=args.ttl, pool_size=max(args.threads, args.concurrency))
+    if args.bulk:
+        results = benchmark_bulk(client, args.cities, args.concurrency, args.rate)
+    else:
+        results = benchmark(client, args.calls, args.cities, args.threads)
+    server.shutdown()
+    for name, value in {**results, "server_requests": server.requests}.items():
+        print(f"{name:<18}{value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
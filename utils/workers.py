@@ -0,0 +1,24 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+_lock = threading.Lock()
+_pool = None
+
+def max_workers():
+    """Returns the size of the shared process pool: one worker per CPU."""
+    return os.cpu_count() or 1
+
+def get_process_pool():
+    """
+    Returns the process pool shared by every page and session, created on first use.
+
+    There is a single pool of `max_workers()` processes per server, so pages that run work
+    in parallel do not each start their own. Callers that want fewer workers bound how many
+    tasks they keep in flight instead.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers())
+        return _pool